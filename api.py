@@ -0,0 +1,342 @@
+# Local JSON API over the streamlit-free model core.
+# Run with:  python api.py --port 8600
+#
+# Endpoints
+#   GET  /health       -> service status and cache statistics
+#   GET  /programmes   -> default scenario for every programme
+#   POST /scenario     -> {"programme": "Insomnia", "retention_rate": 0.8, ...}
+#   POST /batch        -> {"scenarios": [{...}, {...}]}
+#
+# Scenario fields are the keys of model.SCENARIO_FIELDS; anything omitted takes the app's default.
+# Numeric fields must lie within config.INPUT_BOUNDS, the same limits as the app's widgets.
+# Identical requests that arrive while one is still being computed share the same result,
+# finished results are kept in an LRU cache, and large batches run on a process pool. The pool's workers
+# are started from a clean server process rather than forked from this one, so they never hold on to the
+# listening socket or to client connections.
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from config import offerings, INPUT_BOUNDS
+from model import default_scenario, calculate_programme_metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+DEFAULT_CACHE_SIZE = 65536
+MAX_BATCH_SIZE = 10000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+INLINE_BATCH_LIMIT = 32   # Batches with fewer uncached scenarios than this are computed on the event loop
+BATCH_CHUNK_SIZE = 256    # Scenarios per worker task
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# --- Helpers (module level so worker processes can pickle them) ---
+def _json_safe(value):
+    # NaN and infinity aren't valid JSON; the app shows "N/A" for these, so send null
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+def _evaluate_scenario(scenario):
+    return _json_safe(calculate_programme_metrics(scenario))
+
+def _evaluate_chunk(scenarios):
+    return [_evaluate_scenario(scenario) for scenario in scenarios]
+
+def _normalise(payload):
+    if not isinstance(payload, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Each scenario must be a JSON object.")
+    overrides = dict(payload)
+    programme = overrides.pop("programme", None)
+    if not isinstance(programme, str):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'programme' must be one of: {', '.join(offerings)}.")
+    try:
+        scenario = default_scenario(programme, overrides)
+    except (ValueError, TypeError) as e: # TypeError: e.g. an object where a decay model name should be
+        raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+    _check_bounds(scenario)
+    key = json.dumps(scenario, sort_keys=True)
+    return key, scenario
+
+def _check_bounds(scenario):
+    # Also keeps the event loop responsive: the decay sums loop over every working week
+    for field, (low, high) in INPUT_BOUNDS.items():
+        value = scenario[field]
+        if value is None: # e.g. the decay parameters of a model that isn't used
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'{field}' must be a number.")
+        if (low is not None and value < low) or (high is not None and value > high):
+            limits = f"{low:g} to {high:g}" if high is not None else f"at least {low:g}"
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'{field}' is {value:g}, outside the allowed range ({limits}).")
+
+
+class ModelService:
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, max_workers=None):
+        self.cache_size = cache_size
+        self.max_workers = max_workers
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._executor = None
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "computed": 0}
+
+    # --- Cache ---
+    def _cache_get(self, key):
+        results = self._cache.get(key)
+        if results is not None:
+            self._cache.move_to_end(key)
+        return results
+
+    def _cache_put(self, key, results):
+        self._cache[key] = results
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- Evaluation ---
+    async def evaluate(self, payload):
+        self.stats["requests"] += 1
+        key, scenario = _normalise(payload)
+
+        results = self._cache_get(key)
+        if results is not None:
+            self.stats["cache_hits"] += 1
+            return scenario, results
+        if key in self._in_flight:
+            self.stats["coalesced"] += 1
+            results = await asyncio.shield(self._in_flight[key])
+            if isinstance(results, Exception):
+                raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(results))
+            return scenario, results
+
+        # A single scenario is cheap enough to compute on the event loop
+        try:
+            results = _evaluate_scenario(scenario)
+        except (ValueError, TypeError) as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        self.stats["computed"] += 1
+        self._cache_put(key, results)
+        return scenario, results
+
+    async def evaluate_batch(self, payloads):
+        if not isinstance(payloads, list):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'scenarios' must be a list.")
+        if len(payloads) > MAX_BATCH_SIZE:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Batches are limited to {MAX_BATCH_SIZE} scenarios.")
+        self.stats["requests"] += 1
+
+        keys = []
+        results_by_key = {}
+        waiting = {}
+        to_compute = {}
+        for payload in payloads:
+            key, scenario = _normalise(payload)
+            keys.append(key)
+            if key in results_by_key or key in waiting or key in to_compute:
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                results_by_key[key] = cached
+            elif key in self._in_flight:
+                self.stats["coalesced"] += 1
+                waiting[key] = self._in_flight[key]
+            else:
+                to_compute[key] = scenario
+
+        if to_compute:
+            results_by_key.update(await self._compute(to_compute))
+        for key, future in waiting.items():
+            results_by_key[key] = await asyncio.shield(future)
+
+        # Duplicate scenarios within a batch share one results dict
+        for key in keys:
+            if isinstance(results_by_key[key], Exception):
+                raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(results_by_key[key]))
+        return [results_by_key[key] for key in keys]
+
+    async def _compute(self, scenarios_by_key):
+        loop = asyncio.get_running_loop()
+        keys = list(scenarios_by_key)
+        futures = {key: loop.create_future() for key in keys}
+        self._in_flight.update(futures)
+        try:
+            if len(keys) < INLINE_BATCH_LIMIT:
+                chunk_results = [self._compute_inline([scenarios_by_key[key] for key in keys])]
+            else:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD)
+                    )
+                chunks = [keys[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(keys), BATCH_CHUNK_SIZE)]
+                chunk_results = await asyncio.gather(*(
+                    loop.run_in_executor(self._executor, _evaluate_chunk, [scenarios_by_key[key] for key in chunk])
+                    for chunk in chunks
+                ), return_exceptions=True)
+                # A chunk that failed is retried scenario by scenario so one bad input doesn't sink the rest
+                chunk_results = [
+                    self._compute_inline([scenarios_by_key[key] for key in chunk]) if isinstance(results, Exception) else results
+                    for chunk, results in zip(chunks, chunk_results)
+                ]
+            for key, results in zip(keys, (results for chunk in chunk_results for results in chunk)):
+                if not isinstance(results, Exception):
+                    self.stats["computed"] += 1
+                    self._cache_put(key, results)
+                futures[key].set_result(results)
+            return {key: future.result() for key, future in futures.items()}
+        except BaseException as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            for key in keys:
+                self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _compute_inline(scenarios):
+        results = []
+        for scenario in scenarios:
+            try:
+                results.append(_evaluate_scenario(scenario))
+            except (ValueError, TypeError) as e:
+                results.append(e)
+        return results
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- Routing ---
+    async def handle(self, method, path, body):
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "cache_entries": len(self._cache),
+                "in_flight": len(self._in_flight),
+                **self.stats,
+            }
+        if path == "/programmes" and method == "GET":
+            return HTTPStatus.OK, {name: default_scenario(name) for name in offerings}
+        if path in ("/scenario", "/batch"):
+            if method != "POST":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"{path} only accepts POST.")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON.")
+            if path == "/scenario":
+                scenario, results = await self.evaluate(payload)
+                return HTTPStatus.OK, {"scenario": scenario, "results": results}
+            if not isinstance(payload, dict):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be an object with a 'scenarios' list.")
+            return HTTPStatus.OK, {"results": await self.evaluate_batch(payload.get("scenarios"))}
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No endpoint at {path}.")
+
+
+# --- Minimal HTTP/1.1 server (keep-alive, JSON only) ---
+def _response(status, payload, keep_alive):
+    body = json.dumps(_json_safe(payload), separators=(",", ":"), allow_nan=False).encode()
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    ).encode("latin-1")
+    return head + body
+
+async def _handle_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, version = request_line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_response(HTTPStatus.BAD_REQUEST, {"error": "Malformed request line."}, False))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length."}, False))
+                break
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large."}, False))
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            try:
+                status, payload = await service.handle(method, path, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": e.message}
+            except Exception as e:
+                # Includes worker errors passed on to coalesced requests; the client still gets an answer
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Internal error: {e}"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=DEFAULT_CACHE_SIZE, max_workers=None):
+    service = ModelService(cache_size=cache_size, max_workers=max_workers)
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(service, reader, writer), host, port, backlog=1024
+    )
+    print(f"CEA model API listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the CEA coaching model as a local JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for batch requests (default: CPU count).")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size, args.workers))
+    except KeyboardInterrupt:
+        pass
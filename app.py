@@ -8,12 +8,28 @@ from tabs.model_params_tab import display_model_parameters_tab
 from tabs.assumptions_tab import display_assumptions_tab
 from tabs.overall_tab import display_overall_comparison_tab
 from tabs.programme_tab import display_programme_tab
+from tabs.scenario_library_tab import display_scenario_library
+from tabs.batch_results_tab import display_batch_results
+from tabs.capacity_tab import display_capacity_comparison
+from scenario_library import decode_state, restore_app_state
+from rendering import LEAN_RENDERING_KEY, payload_summary, start_payload_meter
 
 # Set the page layout to wide
 st.set_page_config(layout="wide")
 
+# Counts what this rerun sends to the browser (reported in the Intro tab)
+payload_meter = start_payload_meter()
+
 st.title('CEA: Coaching EAs')
 
+# A shared link (?scenario=<code>) sets every widget once, before any of them are drawn
+if "scenario" in st.query_params and not st.session_state.get("scenario_link_applied"):
+    st.session_state["scenario_link_applied"] = True
+    try:
+        restore_app_state(st.session_state, decode_state(st.query_params["scenario"]))
+    except ValueError as e:
+        st.warning(f"Couldn't load the scenario in this link: {e}")
+
 # ==========================================================
 #                 INSTRUCTIONS
 # ==========================================================
@@ -60,6 +76,11 @@ with intro_tab_ui:
     **You should know**
     - We'll be continously updating this model to reflect our current best understanding, largely for our own benefit.
     """)
+    st.toggle(
+        "Low-bandwidth mode", key=LEAN_RENDERING_KEY,
+        help="Sends less to your browser on each change: fewer chart points, charts that update in place, and tables formatted in the browser."
+    )
+    payload_report = st.empty() # Filled in once everything else has been drawn
 
 # --- Render Model Parameters Tab ---
 with model_params_tab_ui:
@@ -98,5 +119,13 @@ with assumptions_tab_ui:
 # --- Render Overall Comparison Tab ---
 with overall_tab_ui:
     display_overall_comparison_tab(offering_results)
+    st.markdown('---')
+    display_capacity_comparison()
+    st.markdown('---')
+    display_batch_results()
+    st.markdown('---')
+    display_scenario_library()
+
+payload_report.caption(payload_summary(payload_meter))
 
 # All function definitions previously here should have been removed by this edit.
\ No newline at end of file
@@ -0,0 +1,190 @@
+# Break-even / threshold solver.
+# Finds the value of one input that makes Cost / Prod. Hr (or Cost per FTE) hit a target, for many
+# scenarios at once. Inputs the model is linear in (hours, retention, time costs, price, ...) are inverted in
+# closed form; the rest (decay rate, months to zero, working weeks, custom curve points) use a vectorised
+# bracketed root-finder. Months to zero and working weeks only move in widget steps, so for those the
+# crossing point is snapped to the nearest step either side of it that meets the target.
+# Trials are what-ifs on one model graph, so each only recomputes the stages downstream of the solved-for
+# input (the decay integral, for one, is computed once unless a decay parameter is being solved for).
+
+import numpy as np
+
+from config import FTE_HOURS_PER_YEAR, INPUT_BOUNDS, INPUT_SEARCH_LIMITS, INPUT_STEPS
+from model import SIGN_UP_HOURS_PER_PARTICIPANT, scenario_columns
+from model_graph import ColumnModelGraph
+
+TARGET_METRICS = ("Cost per Productive Hour Bought", "Cost per FTE")
+
+# Search range for each solvable input: the widget's range, with a search limit where the widget has none
+SOLVABLE_INPUTS = {
+    field: (float(low), float(high) if high is not None else INPUT_SEARCH_LIMITS.get(field, np.inf))
+    for field, (low, high) in INPUT_BOUNDS.items()
+    if field not in ("num_participants", "baseline_org_yearly_clients")
+}
+CLOSED_FORM_INPUTS = (
+    "cost_per_session", "pre_hours", "post_hours", "productivity_multiplier", "retention_rate", "disappointment_hours",
+    "prop_time_work", "homework_hrs", "avg_sessions_dropouts", "session_duration",
+)
+DEFAULT_GRID_POINTS = 33
+DEFAULT_MAX_ITER = 100
+DEFAULT_XTOL = 1e-10
+
+
+# --- Inversion of the inputs net hours is linear in ---
+def _closed_form(variable, columns, graph, target_cost_per_hour):
+    # Net hours = gross gain - time costs - dropout loss, taken from the graph's stages
+    N = columns["num_participants"]
+    R = graph.stage("retained_clients")
+    integral = graph.stage("decay_integral")
+    gross, time_spent, loss = graph.stage("gross_gain"), graph.stage("time_costs"), graph.stage("dropout_loss")
+    sessions = columns["sessions_per_participant"]
+    dropout_sessions = columns["avg_sessions_dropouts"]
+    work_share = columns["prop_time_work"]
+    hours_per_session = columns["session_duration"] + columns["homework_hrs"]
+    sessions_attended = R * sessions + (N - R) * dropout_sessions
+    sign_up_work_hours = N * SIGN_UP_HOURS_PER_PARTICIPANT * work_share
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if variable == "cost_per_session":
+            # Net hours don't depend on the session price
+            hours = gross - time_spent - loss
+            return np.where(hours > 0, target_cost_per_hour * hours / (sessions * N), np.nan)
+
+        required_hours = graph.stage("total_cost") / target_cost_per_hour
+        if variable == "disappointment_hours":
+            return (gross - time_spent - required_hours) / (N - R)
+        if variable == "retention_rate":
+            # Net hours are linear in the number retained
+            per_session_work_hours = hours_per_session * work_share
+            per_retained = (
+                graph.stage("initial_weekly_gain") * integral -
+                sessions * per_session_work_hours +
+                dropout_sessions * per_session_work_hours +
+                columns["disappointment_hours"]
+            )
+            fixed = N * (
+                dropout_sessions * per_session_work_hours +
+                SIGN_UP_HOURS_PER_PARTICIPANT * work_share +
+                columns["disappointment_hours"]
+            )
+            return (required_hours + fixed) / per_retained / N
+
+        # Time costs are linear in the share of time during work, the hours per session and dropouts' sessions
+        if variable == "prop_time_work":
+            return (gross - loss - required_hours) / (sessions_attended * hours_per_session + N * SIGN_UP_HOURS_PER_PARTICIPANT)
+        if variable in ("session_duration", "homework_hrs"):
+            required_hours_per_session = (gross - loss - sign_up_work_hours - required_hours) / (sessions_attended * work_share)
+            other = columns["homework_hrs"] if variable == "session_duration" else columns["session_duration"]
+            return required_hours_per_session - other
+        if variable == "avg_sessions_dropouts":
+            retained_work_hours = R * sessions * hours_per_session * work_share
+            return (gross - loss - sign_up_work_hours - retained_work_hours - required_hours) / ((N - R) * hours_per_session * work_share)
+
+        # The remaining inputs only move the initial weekly gain (pre_hours = 0 is continuous with pre_hours > 0)
+        pre, post, mult = columns["pre_hours"], columns["post_hours"], columns["productivity_multiplier"]
+        required_gain = (required_hours + time_spent + loss) / (integral * R)
+        if variable == "post_hours":
+            return (required_gain + pre) / mult
+        if variable == "pre_hours":
+            return post * mult - required_gain
+        if variable == "productivity_multiplier":
+            return (required_gain + pre) / post
+    raise ValueError(f"No closed form for '{variable}'.")
+
+
+# --- Vectorised bracketed root-finding ---
+def _objective(variable, graph, target_cost_per_hour):
+    # Cost minus target x hours: continuous, and zero exactly at break-even (where hours > 0)
+    def objective(values):
+        results = graph.results_with({variable: values})
+        return results["Total Cost (Money Spent)"] - target_cost_per_hour * results["Number of Productive Hours Bought"]
+    return objective
+
+def _bracket(objective, lower, upper, size, grid_points):
+    # Scan a grid and keep the first sign change above the lower bound for each scenario
+    grid = np.linspace(0.0, 1.0, grid_points)[:, None] * (upper - lower) + lower
+    values = np.vstack([objective(grid[i]) for i in range(grid_points)])
+    sign_change = (np.sign(values[:-1]) * np.sign(values[1:]) <= 0) & ~np.isnan(values[:-1]) & ~np.isnan(values[1:])
+    found = sign_change.any(axis=0)
+    first = np.argmax(sign_change, axis=0)
+    columns = np.arange(size)
+    return found, grid[first, columns], grid[first + 1, columns], values[first, columns], values[first + 1, columns]
+
+def _illinois(objective, a, b, fa, fb, found, xtol, max_iter):
+    # Regula falsi with the Illinois modification, run on every bracket at once
+    a, b, fa, fb = a.copy(), b.copy(), fa.copy(), fb.copy()
+    # A root already sitting on the lower grid point
+    on_a = found & (fa == 0)
+    b[on_a], fb[on_a] = a[on_a], fa[on_a]
+    active = found & (fb != 0)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = np.where(active, b - fb * (b - a) / (fb - fa), b)
+        c = np.where(np.isfinite(c), c, (a + b) / 2)
+        fc = objective(c)
+        straddles = np.sign(fc) * np.sign(fb) < 0
+        a = np.where(active & straddles, b, a)
+        fa = np.where(active & straddles, fb, np.where(active, fa / 2, fa))
+        b = np.where(active, c, b)
+        fb = np.where(active, fc, fb)
+        active &= (fb != 0) & (np.abs(b - a) > xtol * (1 + np.abs(b)))
+    return np.where(found, b, np.nan)
+
+def _snap_to_step(objective, solution, lower, step):
+    # Nearest widget step either side of the crossing at which cost <= target x hours; NaN stays NaN
+    with np.errstate(invalid="ignore"):
+        steps = (solution - lower) / step
+        below = np.round(lower + np.floor(steps + 1e-9) * step, 10)
+        above = np.round(lower + np.ceil(steps - 1e-9) * step, 10)
+    meets_below = objective(np.where(np.isnan(below), lower, below)) <= 0
+    meets_above = objective(np.where(np.isnan(above), lower, above)) <= 0
+    below_nearer = solution - below <= above - solution
+    return np.where(meets_below & (below_nearer | ~meets_above), below, np.where(meets_above, above, np.nan))
+
+
+def solve_break_even(
+    scenarios,
+    variable,
+    target,
+    target_metric="Cost per Productive Hour Bought",
+    bounds=None,
+    grid_points=DEFAULT_GRID_POINTS,
+    xtol=DEFAULT_XTOL,
+    max_iter=DEFAULT_MAX_ITER
+):
+    # scenarios: list of scenario dicts or the output of model.scenario_columns.
+    # Returns one value per scenario; NaN where the target can't be reached within `bounds`.
+    if variable not in SOLVABLE_INPUTS:
+        raise ValueError(f"Cannot solve for '{variable}'. Choose one of: {', '.join(SOLVABLE_INPUTS)}.")
+    if target_metric not in TARGET_METRICS:
+        raise ValueError(f"Target metric must be one of: {', '.join(TARGET_METRICS)}.")
+
+    columns = scenario_columns(scenarios) if isinstance(scenarios, (list, tuple)) else dict(scenarios)
+    size = len(columns["num_participants"])
+    target = np.broadcast_to(np.asarray(target, dtype=np.float64), (size,))
+    if (target <= 0).any():
+        raise ValueError("Target cost must be positive.")
+    target_cost_per_hour = target / FTE_HOURS_PER_YEAR if target_metric == "Cost per FTE" else target
+
+    lower, upper = bounds if bounds is not None else SOLVABLE_INPUTS[variable]
+    graph = ColumnModelGraph(columns)
+    objective = _objective(variable, graph, target_cost_per_hour)
+    if variable in CLOSED_FORM_INPUTS:
+        solution = _closed_form(variable, columns, graph, target_cost_per_hour)
+    else:
+        lower_values = np.full(size, float(lower))
+        upper_values = np.full(size, float(upper))
+        found, a, b, fa, fb = _bracket(objective, lower_values, upper_values, size, grid_points)
+        solution = _illinois(objective, a, b, fa, fb, found, xtol, max_iter)
+    if variable in INPUT_STEPS:
+        solution = _snap_to_step(objective, solution, lower, INPUT_STEPS[variable])
+
+    # Only report break-even points that are reachable and actually give a positive number of hours
+    with np.errstate(invalid="ignore"):
+        in_range = (solution >= lower) & (solution <= upper)
+    solution = np.where(in_range, solution, np.nan)
+    checked = np.where(np.isnan(solution), columns[variable], solution)
+    hours = graph.results_with({variable: checked})["Number of Productive Hours Bought"]
+    return np.where(hours > 0, solution, np.nan)
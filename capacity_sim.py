@@ -0,0 +1,258 @@
+# Discrete-event simulation of coaching capacity.
+# The programme tabs assume every participant starts straight away. Here a fixed pool of coach slots is
+# shared by the org's baseline clients and every EA programme: clients arrive through the year, wait
+# for a free slot (FIFO), may give up while waiting, and hold their slot for one session a week until
+# they complete or drop out. The realised waits delay benefit onset, so fewer benefit weeks fall inside
+# the timeframe of interest, and people who give up on the waiting list count as extra dropouts.
+
+import heapq
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import (
+    DEFAULT_BASELINE_ORG_YEARLY_CLIENTS,
+    DEFAULT_NUM_COACHES,
+    DEFAULT_CASELOAD_PER_COACH,
+    DEFAULT_BASELINE_SESSIONS_PER_CLIENT,
+    DEFAULT_WAITLIST_DROPOUT_RATE_PER_WEEK,
+)
+from model import (
+    SIGN_UP_HOURS_PER_PARTICIPANT,
+    cost_metrics,
+    decay_integral_array,
+    dropout_loss,
+    initial_weekly_gain,
+    time_costs,
+    timeframe_of_interest_weeks,
+    total_cost,
+)
+
+BASELINE_STREAM = "Baseline"
+DEFAULT_WARMUP_WEEKS = 26 # Simulated before recording starts, so the year doesn't begin with an empty waiting list
+
+# Event kinds; at equal times a freed slot is handled before someone gives up waiting
+_DEPARTURE = 0
+_RENEGE = 1
+
+
+def _draw_clients(streams, working_weeks, warmup_weeks, waitlist_dropout_rate, rng):
+    # Poisson arrivals for every stream over warm-up plus one year, merged into time order
+    horizon = warmup_weeks + working_weeks
+    arrivals, stream_ids, completes, service_weeks = [], [], [], []
+    for stream_id, stream in enumerate(streams):
+        count = rng.poisson(stream["yearly_clients"] * horizon / working_weeks)
+        stream_arrivals = rng.uniform(0.0, horizon, count)
+        stream_completes = rng.random(count) < stream["retention_rate"]
+        arrivals.append(stream_arrivals)
+        stream_ids.append(np.full(count, stream_id))
+        completes.append(stream_completes)
+        service_weeks.append(np.where(stream_completes, stream["sessions_per_participant"], stream["avg_sessions_dropouts"]))
+    arrivals = np.concatenate(arrivals)
+    order = np.argsort(arrivals, kind="stable")
+    if waitlist_dropout_rate > 0:
+        patience = rng.exponential(1.0 / waitlist_dropout_rate, arrivals.size)
+    else:
+        patience = np.full(arrivals.size, np.inf)
+    return (
+        arrivals[order],
+        np.concatenate(stream_ids)[order],
+        np.concatenate(completes)[order],
+        np.concatenate(service_weeks)[order],
+        patience,
+    )
+
+def _simulate_queue(arrivals, service_weeks, patience, slots):
+    # Multi-server FIFO queue with reneging. Arrivals are already sorted, so only departures and
+    # give-ups go through the heap.
+    n = arrivals.size
+    start = np.full(n, np.nan)
+    reneged = np.zeros(n, dtype=bool)
+    arrivals_list = arrivals.tolist()
+    service_list = service_weeks.tolist()
+    patience_list = patience.tolist()
+    start_list = [None] * n
+
+    events = []
+    waiting = deque()
+    free_slots = slots
+    next_arrival = 0
+    while next_arrival < n or events:
+        if next_arrival < n and (not events or arrivals_list[next_arrival] <= events[0][0]):
+            client = next_arrival
+            now = arrivals_list[client]
+            next_arrival += 1
+            if free_slots > 0:
+                free_slots -= 1
+                start_list[client] = now
+                heapq.heappush(events, (now + service_list[client], _DEPARTURE, client))
+            else:
+                waiting.append(client)
+                heapq.heappush(events, (now + patience_list[client], _RENEGE, client))
+            continue
+
+        now, kind, client = heapq.heappop(events)
+        if kind == _DEPARTURE:
+            free_slots += 1
+            while waiting and free_slots > 0:
+                next_client = waiting.popleft()
+                if reneged[next_client]:
+                    continue
+                free_slots -= 1
+                start_list[next_client] = now
+                heapq.heappush(events, (now + service_list[next_client], _DEPARTURE, next_client))
+        elif start_list[client] is None:
+            # Gave up while still waiting; left in the deque and skipped when reached
+            reneged[client] = True
+
+    started = np.array([value is not None for value in start_list])
+    start[started] = [value for value in start_list if value is not None]
+    return start, reneged
+
+def _run_replication(streams, working_weeks, slots, warmup_weeks, waitlist_dropout_rate, seed):
+    rng = np.random.default_rng(seed)
+    arrivals, stream_ids, completes, service_weeks, patience = _draw_clients(
+        streams, working_weeks, warmup_weeks, waitlist_dropout_rate, rng
+    )
+    start, reneged = _simulate_queue(arrivals, service_weeks, patience, slots)
+
+    # Only clients arriving during the recorded year count
+    recorded = arrivals >= warmup_weeks
+    started = ~np.isnan(start)
+    window_end = warmup_weeks + working_weeks
+    busy_weeks = np.minimum(start[started] + service_weeks[started], window_end) - np.maximum(start[started], warmup_weeks)
+    replication = {"utilisation": float(np.clip(busy_weeks, 0, None).sum() / (slots * working_weeks))}
+    for stream_id, stream in enumerate(streams):
+        in_stream = recorded & (stream_ids == stream_id)
+        arrived = int(in_stream.sum())
+        completed = in_stream & completes & ~reneged
+        replication[stream["name"]] = {
+            "arrivals": arrived,
+            "completed": int(completed.sum()),
+            "reneged": int((in_stream & reneged).sum()),
+            "waits": start[in_stream & ~reneged] - arrivals[in_stream & ~reneged],
+            "completer_waits": start[completed] - arrivals[completed],
+        }
+    return replication
+
+def _run_replication_batch(args):
+    streams, working_weeks, slots, warmup_weeks, waitlist_dropout_rate, seeds = args
+    return [_run_replication(streams, working_weeks, slots, warmup_weeks, waitlist_dropout_rate, seed) for seed in seeds]
+
+
+def programme_streams(scenarios, baseline_org_yearly_clients=DEFAULT_BASELINE_ORG_YEARLY_CLIENTS,
+                      baseline_sessions_per_client=DEFAULT_BASELINE_SESSIONS_PER_CLIENT):
+    # scenarios: programme name -> scenario dict (see model.default_scenario)
+    streams = [{
+        "name": BASELINE_STREAM,
+        "yearly_clients": baseline_org_yearly_clients,
+        "retention_rate": 1.0,
+        "sessions_per_participant": baseline_sessions_per_client,
+        "avg_sessions_dropouts": baseline_sessions_per_client,
+    }]
+    for programme, scenario in scenarios.items():
+        streams.append({
+            "name": programme,
+            "yearly_clients": scenario["num_participants"],
+            "retention_rate": scenario["retention_rate"],
+            "sessions_per_participant": scenario["sessions_per_participant"],
+            "avg_sessions_dropouts": scenario["avg_sessions_dropouts"],
+        })
+    return streams
+
+def simulate_capacity(
+    scenarios,
+    num_coaches=DEFAULT_NUM_COACHES,
+    caseload_per_coach=DEFAULT_CASELOAD_PER_COACH,
+    waitlist_dropout_rate=DEFAULT_WAITLIST_DROPOUT_RATE_PER_WEEK,
+    replications=20,
+    seed=None,
+    warmup_weeks=DEFAULT_WARMUP_WEEKS,
+    baseline_org_yearly_clients=None,
+    max_workers=1
+):
+    # Returns one dict per replication, keyed by programme name (plus "Baseline" and "utilisation").
+    # max_workers > 1 (or None for one per CPU) spreads replications over a process pool.
+    first = next(iter(scenarios.values()))
+    working_weeks = first["working_weeks"]
+    if baseline_org_yearly_clients is None:
+        baseline_org_yearly_clients = first["baseline_org_yearly_clients"]
+    streams = programme_streams(scenarios, baseline_org_yearly_clients)
+    slots = int(num_coaches * caseload_per_coach)
+    if slots <= 0:
+        raise ValueError("There must be at least one coaching slot.")
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1 or replications == 1:
+        return _run_replication_batch((streams, working_weeks, slots, warmup_weeks, waitlist_dropout_rate, seeds))
+    batches = [seeds[i::max_workers] for i in range(max_workers)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            _run_replication_batch,
+            [(streams, working_weeks, slots, warmup_weeks, waitlist_dropout_rate, batch) for batch in batches if batch]
+        )
+        return [replication for batch in results for replication in batch]
+
+
+# --- Feeding simulated start dates back into the programme model ---
+def capacity_adjusted_metrics(scenario, replications):
+    # Programme results (same keys as model.calculate_programme_metrics) after accounting for waiting:
+    # completers only benefit for the part of the timeframe left after they start, and people who gave
+    # up on the waiting list are extra dropouts who never used a session.
+    programme = scenario["programme"]
+    arrived = sum(rep[programme]["arrivals"] for rep in replications)
+    if arrived == 0:
+        raise ValueError(f"No {programme} clients arrived in the simulation.")
+    completed_fraction = sum(rep[programme]["completed"] for rep in replications) / arrived
+    reneged_fraction = sum(rep[programme]["reneged"] for rep in replications) / arrived
+    completer_waits = np.concatenate([rep[programme]["completer_waits"] for rep in replications])
+
+    timeframe_weeks = timeframe_of_interest_weeks(scenario["working_weeks"])
+    if completer_waits.size:
+        # The unconstrained model counts benefit from the start of the timeframe; waiting pushes that start back
+        delayed_integrals = decay_integral_array(
+            scenario["decay_model"],
+            np.nan if scenario["annual_decay_rate"] is None else scenario["annual_decay_rate"],
+            np.nan if scenario["months_to_zero"] is None else scenario["months_to_zero"],
+            scenario["custom_month_3"],
+            scenario["custom_month_6"],
+            scenario["custom_month_9"],
+            scenario["custom_month_12"],
+            scenario["working_weeks"],
+            benefit_weeks=timeframe_weeks - completer_waits
+        )
+        mean_integral = float(np.mean(delayed_integrals))
+    else:
+        mean_integral = 0.0
+
+    N = scenario["num_participants"]
+    retained = N * completed_fraction
+    reneged = N * reneged_fraction
+    started = N - reneged
+    gross = initial_weekly_gain(scenario["pre_hours"], scenario["post_hours"], scenario["productivity_multiplier"]) * mean_integral * retained
+    time_spent = time_costs(
+        started,
+        retained,
+        scenario["sessions_per_participant"],
+        scenario["avg_sessions_dropouts"],
+        scenario["session_duration"],
+        scenario["homework_hrs"],
+        scenario["prop_time_work"]
+    ) + reneged * SIGN_UP_HOURS_PER_PARTICIPANT * scenario["prop_time_work"]
+    loss = dropout_loss(N, retained, scenario["disappointment_hours"])
+
+    results = cost_metrics(
+        # Sessions are only paid for people who get a slot
+        total_cost(scenario["sessions_per_participant"], scenario["cost_per_session"], started),
+        gross - time_spent - loss,
+        N,
+        retained,
+        scenario["baseline_org_yearly_clients"]
+    )
+    results["Mean Wait (weeks)"] = float(np.mean(completer_waits)) if completer_waits.size else 0.0
+    results["Gave Up Waiting"] = reneged
+    return results
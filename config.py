@@ -51,6 +51,64 @@ DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS = 12.0
 DEFAULT_DISAPPOINTMENT_HOURS_PER_DROPOUT = 40.0
 DEFAULT_BASELINE_ORG_YEARLY_CLIENTS = 3100.0 # Baseline yearly clients for the org, EXCLUDING this specific EA offering's participants
 
+# Coaching capacity (used by the capacity simulation in capacity_sim.py)
+DEFAULT_NUM_COACHES = 20
+DEFAULT_CASELOAD_PER_COACH = 25 # Clients a coach can see each week, one session per client per week
+DEFAULT_BASELINE_SESSIONS_PER_CLIENT = 6.0 # Sessions used by each of the org's baseline (non-EA) clients
+DEFAULT_WAITLIST_DROPOUT_RATE_PER_WEEK = 0.05 # Weekly hazard of someone on the waiting list giving up
+
+# One full-time equivalent, for one year: 40 hours a week with no holidays
+FTE_HOURS_PER_YEAR = 2080
+
+# Range each input widget allows, in model units (rates as fractions, not the slider percentages); None means
+# the widget has no limit that side. Keep in step with the widgets in tabs/. Share codes are checked against these.
+INPUT_BOUNDS = {
+    "annual_decay_rate": (0.001, 0.999),
+    "months_to_zero": (1.0, 60.0),
+    "custom_month_3": (0.0, 1.0),
+    "custom_month_6": (0.0, 1.0),
+    "custom_month_9": (0.0, 1.0),
+    "custom_month_12": (0.0, 1.0),
+    "pre_hours": (0, 80),
+    "post_hours": (0, 80),
+    "productivity_multiplier": (0.0, 2.0),
+    "retention_rate": (0.0, 1.0),
+    "num_participants": (10, 1000),
+    "cost_per_session": (0.0, None),
+    "working_weeks": (1, 52),
+    "prop_time_work": (0.0, 1.0),
+    "homework_hrs": (0.0, None),
+    "avg_sessions_dropouts": (0.0, None),
+    "session_duration": (0.1, None),
+    "disappointment_hours": (0.0, None),
+    "baseline_org_yearly_clients": (0.0, None),
+}
+# Inputs whose widgets only move in steps (the model can take any value in between)
+INPUT_STEPS = {
+    "months_to_zero": 0.1,
+    "working_weeks": 1,
+}
+# Where searches need a finite range for an input whose widget has no upper limit (break-even brackets)
+INPUT_SEARCH_LIMITS = {
+    "homework_hrs": 40.0,
+    "avg_sessions_dropouts": 20.0,
+    "session_duration": 8.0,
+    "disappointment_hours": 400.0,
+}
+
+# Costs of growing a programme past the current team (used by scale_costs.py). Rough planning assumptions.
+DEFAULT_COACH_HIRING_COST = 3000.0 # Recruiting and training one extra coach
+DEFAULT_COACH_HIRING_AMORTISATION_YEARS = 3.0 # Hiring is spread over how long a new coach is expected to stay
+DEFAULT_COACHES_PER_SUPERVISOR = 8
+DEFAULT_SUPERVISOR_COST_PER_YEAR = 45000.0
+# Outreach cost to find each participant. It rises as a programme reaches further into the community:
+# the marginal cost is recruitment_cost_per_participant x (1 + participants / recruitment_saturation).
+programme_scale_costs = {
+    "Bespoke Offering": {"recruitment_cost_per_participant": 20.0, "recruitment_saturation": 3000.0},
+    "Procrastination": {"recruitment_cost_per_participant": 10.0, "recruitment_saturation": 5000.0},
+    "Insomnia": {"recruitment_cost_per_participant": 10.0, "recruitment_saturation": 8000.0},
+}
+
 # Constants for overall cost explanation
 ORGANISATION_FIXED_COSTS = 136000 # Fixed R&D Budget in USD 
 
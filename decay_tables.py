@@ -0,0 +1,145 @@
+# Precomputed decay chart series.
+# The decay chart is redrawn on every rerun from the slider position, and the sliders only take a few
+# thousand values: the annual decay slider steps by 0.1% from 0.1% to 99.9% and months-to-zero steps by
+# 0.1 from 1 to 60. Every chart series for those positions is computed once, by the same model functions
+# the chart would otherwise call, so drawing the chart starts from an array lookup with bit-for-bit the
+# same numbers. Any value that isn't exactly on the grid falls back to computing.
+# The decay integral itself isn't tabulated: the closed forms cost about as much as the lookup.
+# Build a table file with:  python decay_tables.py --out decay_tables.npz
+
+import argparse
+import os
+import warnings
+
+import numpy as np
+
+from model import exponential_decay_series, linear_decay_series
+
+# Slider positions in tenths: 0.1%..99.9% annual decay, 1.0..60.0 months to zero
+DECAY_RATE_TENTHS = np.arange(1, 1000)
+MONTHS_TO_ZERO_TENTHS = np.arange(10, 601)
+VERIFY_SAMPLES = 64 # Entries re-computed when a table is loaded from a file
+TABLE_FORMAT_VERSION = 2
+
+# "" builds the table in memory at startup, "off" turns the lookup off, anything else is a .npz file
+# (built and saved there if it doesn't exist yet)
+DECAY_TABLE_PATH = os.environ.get("EA_COACHING_DECAY_TABLE", "")
+
+
+def _annual_decay_rate(tenths):
+    # The value the app passes: the slider's percentage divided by 100
+    return (tenths / 10) / 100.0
+
+def _months_to_zero(tenths):
+    return tenths / 10
+
+
+class DecayLookupTable:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.rates = arrays["annual_decay_rates"]
+        self.months_to_zero = arrays["months_to_zero"]
+
+    @classmethod
+    def build(cls):
+        rates = np.array([_annual_decay_rate(int(tenths)) for tenths in DECAY_RATE_TENTHS])
+        months_to_zero = np.array([_months_to_zero(int(tenths)) for tenths in MONTHS_TO_ZERO_TENTHS])
+
+        exponential_series = np.array([exponential_decay_series(rate)[1] for rate in rates.tolist()], dtype=np.float64)
+        linear_lengths = np.array([len(linear_decay_series(months)[0]) for months in months_to_zero.tolist()])
+        linear_series = np.full((months_to_zero.size, linear_lengths.max()), np.nan)
+        for i, months in enumerate(months_to_zero.tolist()):
+            linear_series[i, :linear_lengths[i]] = linear_decay_series(months)[1]
+
+        return cls({
+            "format_version": np.array(TABLE_FORMAT_VERSION),
+            "annual_decay_rates": rates,
+            "months_to_zero": months_to_zero,
+            "exponential_series": exponential_series,
+            "linear_series": linear_series,
+            "linear_series_lengths": linear_lengths,
+        })
+
+    # --- Files ---
+    def save(self, path):
+        np.savez_compressed(path, **self.arrays)
+
+    @classmethod
+    def load(cls, path, verify_samples=VERIFY_SAMPLES):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        if int(arrays.get("format_version", -1)) != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Decay table '{path}' was built for a different model version.")
+        table = cls(arrays)
+        table.verify(verify_samples)
+        return table
+
+    def verify(self, samples=VERIFY_SAMPLES, seed=0):
+        # Spot-check entries against the computed path; a table built on another machine could differ in the last bit
+        rng = np.random.default_rng(seed)
+        for i in rng.integers(self.rates.size, size=samples):
+            rate = float(self.rates[i])
+            if not np.array_equal(self.exponential_series(rate)[1], exponential_decay_series(rate)[1]):
+                raise ValueError("Decay table doesn't match the model; rebuild it.")
+        for i in rng.integers(self.months_to_zero.size, size=samples):
+            months = float(self.months_to_zero[i])
+            if not np.array_equal(self.linear_series(months)[1], linear_decay_series(months)[1]):
+                raise ValueError("Decay table doesn't match the model; rebuild it.")
+
+    # --- Lookups (None when the value isn't on the grid) ---
+    # Only plain Python numbers (what the sliders give) are looked up: numpy scalars take a different
+    # power routine in the computed path, which can differ in the last bit.
+    def _rate_index(self, annual_decay_rate):
+        if type(annual_decay_rate) not in (float, int):
+            return None
+        i = int(round(annual_decay_rate * 1000)) - 1
+        if 0 <= i < self.rates.size and self.rates[i] == annual_decay_rate:
+            return i
+        return None
+
+    def _months_index(self, months_to_zero):
+        if type(months_to_zero) not in (float, int):
+            return None
+        i = int(round(months_to_zero * 10)) - int(MONTHS_TO_ZERO_TENTHS[0])
+        if 0 <= i < self.months_to_zero.size and self.months_to_zero[i] == months_to_zero:
+            return i
+        return None
+
+    def exponential_series(self, annual_decay_rate):
+        # (months, relative benefit) for the exponential decay chart
+        i = self._rate_index(annual_decay_rate)
+        if i is None:
+            return None
+        return np.arange(0, 13, 1), self.arrays["exponential_series"][i]
+
+    def linear_series(self, months_to_zero):
+        i = self._months_index(months_to_zero)
+        if i is None:
+            return None
+        months_to_plot = np.arange(0, max(13, months_to_zero + 1), 1)
+        return months_to_plot, self.arrays["linear_series"][i, :self.arrays["linear_series_lengths"][i]]
+
+
+def load_or_build_decay_table(path=DECAY_TABLE_PATH):
+    if path == "off":
+        return None
+    if not path:
+        return DecayLookupTable.build()
+    if os.path.exists(path):
+        try:
+            return DecayLookupTable.load(path)
+        except (ValueError, KeyError, OSError) as e:
+            # Someone else's file: leave it alone and compute the chart series instead
+            warnings.warn(f"Couldn't use the decay table '{path}' ({e}); the decay charts will be computed.")
+            return None
+    table = DecayLookupTable.build()
+    table.save(path)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the decay lookup tables used by the app.")
+    parser.add_argument("--out", default="decay_tables.npz", help="File to write (.npz).")
+    args = parser.parse_args()
+    DecayLookupTable.build().save(args.out)
+    print(f"Wrote {args.out}")
@@ -0,0 +1,241 @@
+# Headless load test for the Streamlit app.
+# Run with:  python load_test.py --sessions 1 4 16 --steps 40 [--mode process]
+#
+# Each simulated viewer is a streamlit AppTest session running app.py. By default the sessions run as
+# threads in one process, as they do on a real Streamlit server: they share the GIL and the st.cache_*
+# caches, so the report shows how rerun latency degrades on a single server as viewers are added.
+# --mode process gives each session its own worker process instead, which only shows how the machine's
+# cores scale. Every session replays slider drags (a run of small steps, one rerun per step) across the
+# programme tabs and the Model Parameters tab, and all sessions start replaying at the same moment.
+# For each session count we report rerun latency percentiles, total reruns per second, and the resident
+# memory each session added on top of the imported app.
+#
+# --api http://127.0.0.1:8600 load-tests a running api.py instead: each session is one keep-alive connection
+# posting /scenario requests (random programmes and participant counts, so a mix of cache hits and fresh
+# computations), and the report gives request latency and requests per second.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from config import offerings, DEFAULT_COST_PER_SESSION
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+DEFAULT_SESSION_COUNTS = (1, 2, 4, 8)
+DEFAULT_STEPS = 30
+DRAG_STEPS = (3, 8) # A drag is this many consecutive reruns (min, max)
+RERUN_TIMEOUT = 120
+LOAD_TEST_MODES = ("thread", "process")
+
+# (widget type, key or label, min, max, step)
+PROGRAMME_SLIDERS = (
+    ("slider", "annual_decay_{tab}", 0.1, 99.9, 0.1),
+    ("slider", "pre_hours_{tab}", 0, 80, 1),
+    ("slider", "post_hours_{tab}", 0, 80, 1),
+    ("slider", "productivity_multiplier_{tab}", 0.0, 2.0, 0.01),
+    ("slider", "retention_rate_{tab}", 0.0, 100.0, 0.1),
+    ("slider", "num_participants_{tab}", 10, 1000, 1),
+)
+MODEL_PARAMETER_WIDGETS = (
+    ("number_input", "cost_per_session_global", 0.0, 4 * DEFAULT_COST_PER_SESSION, 0.5),
+    ("number_input", "working_weeks_global", 30, 52, 1),
+    ("slider", "prop_time_work_global", 0.0, 100.0, 0.1),
+    ("number_input", "disappointment_hours_global", 0.0, 100.0, 1.0),
+)
+
+
+def _resident_memory_bytes():
+    # Current RSS from /proc; falls back to peak RSS where /proc isn't available
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _find_widget(at, widget_type, key_or_label):
+    for widget in getattr(at, widget_type):
+        if widget.key == key_or_label or widget.label == key_or_label:
+            return widget
+    return None
+
+def plan_session(rng, steps):
+    # A sequence of (widget type, key or label, value) actions made of drags: each drag walks one widget
+    # from its current position towards a random target a step at a time.
+    widgets = [
+        (kind, key.format(tab=tab), low, high, step)
+        for tab in offerings for kind, key, low, high, step in PROGRAMME_SLIDERS
+    ] + list(MODEL_PARAMETER_WIDGETS)
+    positions = {}
+    actions = []
+    while len(actions) < steps:
+        kind, key, low, high, step = widgets[rng.integers(len(widgets))]
+        start = positions.get(key, (low + high) / 2)
+        target = rng.uniform(low, high)
+        drag_length = int(rng.integers(DRAG_STEPS[0], DRAG_STEPS[1] + 1))
+        for value in np.linspace(start, target, drag_length + 1)[1:]:
+            value = min(max(round(round(value / step) * step, 6), low), high)
+            if isinstance(low, int) and isinstance(step, int):
+                value = int(value)
+            actions.append((kind, key, value))
+        positions[key] = target
+    return actions[:steps]
+
+def _run_session(actions, ready, go, results):
+    memory_before = _resident_memory_bytes()
+    latencies, errors = [], []
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT).run()
+    except Exception as e:
+        errors.append(repr(e))
+        at = None
+    memory_loaded = _resident_memory_bytes()
+    ready.release()
+    go.wait()
+    for kind, key, value in actions if at is not None else ():
+        widget = _find_widget(at, kind, key)
+        if widget is None:
+            # e.g. the decay slider isn't shown for this decay model
+            continue
+        started = time.perf_counter()
+        try:
+            widget.set_value(value).run()
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - started)
+        if at.exception:
+            errors.append(at.exception[0].value)
+    results.put((latencies, errors, memory_loaded - memory_before))
+
+def run_load_level(num_sessions, steps, seed=0, mode="thread"):
+    if mode not in LOAD_TEST_MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Choose one of: {', '.join(LOAD_TEST_MODES)}.")
+    rng = np.random.default_rng([seed, num_sessions])
+    plans = [plan_session(rng, steps) for _ in range(num_sessions)]
+    if mode == "thread":
+        ready, go, results = threading.Semaphore(0), threading.Event(), queue.Queue()
+        workers = [threading.Thread(target=_run_session, args=(plan, ready, go, results), daemon=True) for plan in plans]
+    else:
+        context = multiprocessing.get_context()
+        ready, go, results = context.Semaphore(0), context.Event(), context.Queue()
+        workers = [context.Process(target=_run_session, args=(plan, ready, go, results), daemon=True) for plan in plans]
+
+    memory_before = _resident_memory_bytes()
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.acquire()
+    # Threads share one process, so their memory is only measurable together
+    memory_per_thread = (_resident_memory_bytes() - memory_before) / num_sessions
+
+    started = time.perf_counter()
+    go.set()
+    session_results = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    all_latencies = np.concatenate([np.asarray(latencies, dtype=np.float64) for latencies, _, _ in session_results]) * 1000
+    p50, p95, p99 = np.percentile(all_latencies, [50, 95, 99]) if all_latencies.size else (np.nan, np.nan, np.nan)
+    return {
+        "Sessions": num_sessions,
+        "Reruns": int(all_latencies.size),
+        "p50 (ms)": p50,
+        "p95 (ms)": p95,
+        "p99 (ms)": p99,
+        "Throughput (reruns/s)": all_latencies.size / elapsed if elapsed > 0 else np.nan,
+        "Memory / Session (MB)": (memory_per_thread if mode == "thread" else np.mean([memory for _, _, memory in session_results])) / 1e6,
+        "Errors": sum(len(errors) for _, errors, _ in session_results),
+    }
+
+# --- API mode ---
+async def _api_session(host, port, bodies, go, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    await go.wait()
+    try:
+        for body in bodies:
+            started = time.perf_counter()
+            writer.write(
+                f"POST /scenario HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def _run_api_level(url, num_sessions, steps, seed):
+    parts = urlsplit(url)
+    rng = np.random.default_rng([seed, num_sessions])
+    programmes = list(offerings)
+    plans = [[
+        json.dumps({"programme": programmes[rng.integers(len(programmes))], "num_participants": int(rng.integers(10, 1001))}).encode()
+        for _ in range(steps)
+    ] for _ in range(num_sessions)]
+    go = asyncio.Event()
+    latencies, errors = [], []
+    sessions = [
+        asyncio.create_task(_api_session(parts.hostname, parts.port or 80, plan, go, latencies, errors)) for plan in plans
+    ]
+    await asyncio.sleep(0.1) # Let every connection open before the clock starts
+    started = time.perf_counter()
+    go.set()
+    await asyncio.gather(*sessions)
+    return np.asarray(latencies) * 1000, errors, time.perf_counter() - started
+
+def run_api_load_level(url, num_sessions, steps, seed=0):
+    latencies, errors, elapsed = asyncio.run(_run_api_level(url, num_sessions, steps, seed))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies.size else (np.nan, np.nan, np.nan)
+    return {
+        "Sessions": num_sessions,
+        "Requests": int(latencies.size),
+        "p50 (ms)": p50,
+        "p95 (ms)": p95,
+        "p99 (ms)": p99,
+        "Throughput (requests/s)": latencies.size / elapsed if elapsed > 0 else np.nan,
+        "Errors": len(errors),
+    }
+
+def run_load_test(session_counts=DEFAULT_SESSION_COUNTS, steps=DEFAULT_STEPS, seed=0, mode="thread"):
+    # Run the app once up front so imports and one-off caches are already loaded (and inherited by forked
+    # workers), rather than being charged to the first rerun and to each session's memory
+    AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT).run()
+    return pd.DataFrame([run_load_level(count, steps, seed, mode) for count in session_counts]).set_index("Sessions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure rerun latency of app.py under concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(DEFAULT_SESSION_COUNTS), help="Session counts to test.")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="Reruns per session.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", default="thread", choices=LOAD_TEST_MODES, help="Run sessions as threads in one process (like a Streamlit server) or as separate processes.")
+    parser.add_argument("--csv", help="Also write the report to this CSV file.")
+    parser.add_argument("--api", help="Load-test a running api.py at this URL (e.g. http://127.0.0.1:8600) instead of the app.")
+    args = parser.parse_args()
+
+    if args.api:
+        report = pd.DataFrame([run_api_load_level(args.api, count, args.steps, args.seed) for count in args.sessions]).set_index("Sessions")
+    else:
+        report = run_load_test(args.sessions, args.steps, args.seed, args.mode)
+    with pd.option_context("display.float_format", "{:,.1f}".format, "display.width", 160, "display.max_columns", None):
+        print(report)
+    if args.csv:
+        report.to_csv(args.csv)
@@ -0,0 +1,432 @@
+# Streamlit-free model core for the CEA Coaching EAs app.
+# The programme tabs, the JSON API and any batch tooling all evaluate scenarios through here,
+# so the numbers shown in the app and the numbers served elsewhere always agree.
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+from config import (
+    offerings,
+    DEFAULT_COST_PER_SESSION,
+    DEFAULT_WORKING_WEEKS_PER_YEAR,
+    DEFAULT_PROPORTION_TIME_DURING_WORK,
+    DEFAULT_HOMEWORK_HOURS_PER_SESSION,
+    DEFAULT_AVG_SESSIONS_FOR_DROPOUTS,
+    DEFAULT_SESSION_DURATION,
+    DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS,
+    DEFAULT_DISAPPOINTMENT_HOURS_PER_DROPOUT,
+    DEFAULT_BASELINE_ORG_YEARLY_CLIENTS,
+    FTE_HOURS_PER_YEAR,
+)
+
+DECAY_MODELS = ["Exponential Decay", "Linear Decay", "Custom Curve"]
+SIGN_UP_HOURS_PER_PARTICIPANT = 0.5 # Assuming this is a constant
+
+# Default control points (as fractions) for the Custom Curve sliders
+DEFAULT_CUSTOM_CURVE_POINTS = {
+    "month_3": 0.75,
+    "month_6": 0.50,
+    "month_9": 0.30,
+    "month_12": 0.15,
+}
+
+# Every input a scenario can carry. Rates are fractions (0-1), not the percentages shown on sliders.
+SCENARIO_FIELDS = (
+    "programme",
+    "decay_model",
+    "annual_decay_rate",
+    "months_to_zero",
+    "custom_month_3",
+    "custom_month_6",
+    "custom_month_9",
+    "custom_month_12",
+    "pre_hours",
+    "post_hours",
+    "productivity_multiplier",
+    "retention_rate",
+    "num_participants",
+    "sessions_per_participant",
+    "cost_per_session",
+    "working_weeks",
+    "prop_time_work",
+    "homework_hrs",
+    "avg_sessions_dropouts",
+    "session_duration",
+    "disappointment_hours",
+    "baseline_org_yearly_clients",
+)
+
+# --- Default scenario for a programme ---
+def default_scenario(programme, overrides=None):
+    if programme not in offerings:
+        raise ValueError(f"Unknown programme '{programme}'. Choose one of: {', '.join(offerings)}.")
+    tab_defaults = offerings[programme]
+
+    scenario = {
+        "programme": programme,
+        "decay_model": tab_defaults.get("default_decay_model", "Exponential Decay"),
+        "annual_decay_rate": tab_defaults.get("default_decay_rate", 25.0) / 100.0,
+        "months_to_zero": tab_defaults.get("default_months_to_zero", 12.0),
+        "custom_month_3": DEFAULT_CUSTOM_CURVE_POINTS["month_3"],
+        "custom_month_6": DEFAULT_CUSTOM_CURVE_POINTS["month_6"],
+        "custom_month_9": DEFAULT_CUSTOM_CURVE_POINTS["month_9"],
+        "custom_month_12": DEFAULT_CUSTOM_CURVE_POINTS["month_12"],
+        # The Procrastination tab starts from these slider values rather than its config entry
+        "pre_hours": 30 if programme == "Procrastination" else tab_defaults["pre_intervention_hours"],
+        "post_hours": 39 if programme == "Procrastination" else tab_defaults["post_intervention_hours"],
+        "productivity_multiplier": 1.01 if programme == "Procrastination" else tab_defaults["productivity_multiplier"],
+        "retention_rate": tab_defaults["retention"] / 100.0,
+        "num_participants": tab_defaults["num_participants"],
+        "sessions_per_participant": tab_defaults["sessions_per_participant"],
+        "cost_per_session": DEFAULT_COST_PER_SESSION,
+        "working_weeks": DEFAULT_WORKING_WEEKS_PER_YEAR,
+        "prop_time_work": DEFAULT_PROPORTION_TIME_DURING_WORK,
+        "homework_hrs": DEFAULT_HOMEWORK_HOURS_PER_SESSION,
+        "avg_sessions_dropouts": DEFAULT_AVG_SESSIONS_FOR_DROPOUTS,
+        "session_duration": DEFAULT_SESSION_DURATION,
+        "disappointment_hours": DEFAULT_DISAPPOINTMENT_HOURS_PER_DROPOUT,
+        "baseline_org_yearly_clients": DEFAULT_BASELINE_ORG_YEARLY_CLIENTS,
+    }
+
+    if overrides:
+        unknown = [key for key in overrides if key not in SCENARIO_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown scenario field(s): {', '.join(sorted(unknown))}.")
+        scenario.update(overrides)
+
+    if scenario["decay_model"] not in DECAY_MODELS:
+        raise ValueError(f"Unknown decay model '{scenario['decay_model']}'. Choose one of: {', '.join(DECAY_MODELS)}.")
+    return scenario
+
+# --- Timeframe in working weeks ---
+def timeframe_of_interest_weeks(working_weeks_per_year, timeframe_of_interest_months=DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS):
+    return (timeframe_of_interest_months / 12) * working_weeks_per_year
+
+# --- Custom curve interpolation ---
+def custom_curve_interpolator(month_3, month_6, month_9, month_12):
+    control_points_custom = {
+        0: 1.0, 3: month_3, 6: month_6,
+        9: month_9, 12: month_12
+    }
+    x_points = np.array(list(control_points_custom.keys()))
+    y_points = np.array(list(control_points_custom.values()))
+    return PchipInterpolator(x_points, y_points)
+
+def custom_curve_weekly_points(month_3, month_6, month_9, month_12, timeframe_of_interest_weeks_calc):
+    interp_func = custom_curve_interpolator(month_3, month_6, month_9, month_12)
+    custom_curve_weekly_points = []
+    weeks_in_period_calc = int(timeframe_of_interest_weeks_calc)
+    for w in range(weeks_in_period_calc):
+        month_equiv = (w / weeks_in_period_calc) * 12
+        benefit_at_week = float(interp_func(month_equiv))
+        custom_curve_weekly_points.append(max(0, min(1, benefit_at_week)))
+    return custom_curve_weekly_points
+
+# --- Decay chart series ---
+def exponential_decay_series(annual_decay_rate):
+    # Relative benefit at each month 0-12, as drawn in the decay chart
+    months = np.arange(0, 13, 1)
+    monthly_decay_rate = 1 - (1 - annual_decay_rate)**(1/12)
+    return months, [1 * (1 - monthly_decay_rate)**month for month in months]
+
+def linear_decay_series(months_to_zero):
+    months_to_plot = np.arange(0, max(13, months_to_zero + 1), 1)
+    return months_to_plot, [max(0, 1 - month/months_to_zero) for month in months_to_plot]
+
+# --- Function to calculate total gain per EA ---
+def calculate_total_gain_per_ea(
+    initial_weekly_gain_per_ea_abs,
+    decay_model,
+    timeframe_of_interest_weeks,
+    working_weeks_per_year,
+    annual_decay_rate=None,
+    months_to_zero=None,
+    custom_weekly_points=None
+):
+    total_gain = 0.0
+
+    if decay_model == "Exponential Decay":
+        if annual_decay_rate is None:
+            raise ValueError("Annual decay rate must be provided for Exponential Decay model.")
+
+        if annual_decay_rate == 0.0 or annual_decay_rate == 1.0:
+            raise ValueError("Annual decay rate cannot be 0% (0.0) or 100% (1.0) for Exponential Decay. Please choose a value strictly between 0 and 1.")
+
+        if working_weeks_per_year > 0 and 0 < annual_decay_rate < 1:
+            weekly_decay_factor = (1.0 - annual_decay_rate)**(1.0 / working_weeks_per_year)
+            if abs(1.0 - weekly_decay_factor) < 1e-9:
+                 total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks
+            else:
+                total_gain = initial_weekly_gain_per_ea_abs * \
+                                            (1.0 - weekly_decay_factor**timeframe_of_interest_weeks) / \
+                                            (1.0 - weekly_decay_factor)
+        elif working_weeks_per_year <= 0:
+            total_gain = 0.0
+        else:
+            total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks
+
+    elif decay_model == "Linear Decay":
+        if months_to_zero is not None and working_weeks_per_year > 0 and months_to_zero > 0:
+            weeks_to_zero_calc = (months_to_zero / 12) * working_weeks_per_year
+            if weeks_to_zero_calc > 0: # Redundant check but safe
+                effective_weeks = min(timeframe_of_interest_weeks, weeks_to_zero_calc)
+                for w_idx in range(int(effective_weeks)):
+                    weekly_benefit = initial_weekly_gain_per_ea_abs * max(0, (1 - w_idx / weeks_to_zero_calc))
+                    total_gain += weekly_benefit
+        else:
+             total_gain = 0
+
+    elif decay_model == "Custom Curve":
+        if custom_weekly_points:
+            for week_benefit_factor in custom_weekly_points:
+                total_gain += initial_weekly_gain_per_ea_abs * week_benefit_factor
+        else:
+            total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks * 0.5
+
+    return total_gain
+
+# --- Model stages ---
+# Each stage's parameters are named after the scenario fields or earlier stages it reads, which is
+# how model_graph.py wires them together for incremental recomputation.
+def decay_integral(
+    decay_model,
+    annual_decay_rate,
+    months_to_zero,
+    custom_month_3,
+    custom_month_6,
+    custom_month_9,
+    custom_month_12,
+    working_weeks
+):
+    # Hours gained over the timeframe per hour of initial weekly gain
+    timeframe_weeks = timeframe_of_interest_weeks(working_weeks)
+    custom_weekly_points = None
+    if decay_model == "Custom Curve":
+        custom_weekly_points = custom_curve_weekly_points(
+            custom_month_3, custom_month_6, custom_month_9, custom_month_12, timeframe_weeks
+        )
+    return calculate_total_gain_per_ea(
+        initial_weekly_gain_per_ea_abs=1.0,
+        decay_model=decay_model,
+        timeframe_of_interest_weeks=timeframe_weeks,
+        working_weeks_per_year=working_weeks,
+        annual_decay_rate=annual_decay_rate if decay_model == "Exponential Decay" else None,
+        months_to_zero=months_to_zero if decay_model == "Linear Decay" else None,
+        custom_weekly_points=custom_weekly_points
+    )
+
+def initial_weekly_gain(pre_hours, post_hours, productivity_multiplier):
+    if pre_hours == 0:
+        return post_hours * productivity_multiplier
+    return (post_hours * productivity_multiplier) - pre_hours
+
+def retained_clients(num_participants, retention_rate):
+    return num_participants * retention_rate
+
+def gross_gain(decay_integral, initial_weekly_gain, retained_clients):
+    # Total gross hours from all EAs who are retained, before accounting for time spent on intervention
+    return initial_weekly_gain * decay_integral * retained_clients
+
+def time_costs(
+    num_participants,
+    retained_clients,
+    sessions_per_participant,
+    avg_sessions_dropouts,
+    session_duration,
+    homework_hrs,
+    prop_time_work
+):
+    # Work hours spent in sessions, homework and sign-up by completers and dropouts alike
+    time_spent_retained_during_work = (
+        retained_clients *
+        sessions_per_participant *
+        (session_duration + homework_hrs) *
+        prop_time_work
+    )
+    time_spent_dropouts_during_work = (
+        (num_participants - retained_clients) *
+        avg_sessions_dropouts *
+        (session_duration + homework_hrs) *
+        prop_time_work
+    )
+    time_spent_on_sign_up_during_work = (
+        num_participants *
+        SIGN_UP_HOURS_PER_PARTICIPANT *
+        prop_time_work
+    )
+    return time_spent_retained_during_work + time_spent_dropouts_during_work + time_spent_on_sign_up_during_work
+
+def dropout_loss(num_participants, retained_clients, disappointment_hours):
+    return (num_participants - retained_clients) * disappointment_hours
+
+def net_hours(gross_gain, time_costs, dropout_loss):
+    return gross_gain - time_costs - dropout_loss
+
+def total_cost(sessions_per_participant, cost_per_session, num_participants):
+    # Total cost is only the direct sessions cost
+    return sessions_per_participant * cost_per_session * num_participants
+
+def cost_metrics(total_cost, net_hours, num_participants, retained_clients, baseline_org_yearly_clients):
+    cost_per_productive_hour_bought = total_cost / net_hours if net_hours != 0 else np.nan
+    net_hours_gained_per_retained_client = (net_hours / retained_clients) if retained_clients > 0 else 0
+
+    return {
+        "Total Cost (Money Spent)": total_cost, # This is the direct cost
+        "Number of Productive Hours Bought": net_hours,
+        "Cost per Productive Hour Bought": cost_per_productive_hour_bought,
+        "Total Clients Seen": num_participants,
+        "Clients Retained": retained_clients,
+        "Net Hours Gained per Retained Client": net_hours_gained_per_retained_client,
+        "Baseline Org Yearly Clients Config": baseline_org_yearly_clients # Pass this through for Overall tab context
+    }
+
+# --- Programme metrics for one scenario ---
+def calculate_programme_metrics(scenario):
+    integral = decay_integral(
+        scenario["decay_model"],
+        scenario["annual_decay_rate"],
+        scenario["months_to_zero"],
+        scenario["custom_month_3"],
+        scenario["custom_month_6"],
+        scenario["custom_month_9"],
+        scenario["custom_month_12"],
+        scenario["working_weeks"]
+    )
+    retained = retained_clients(scenario["num_participants"], scenario["retention_rate"])
+    gross = gross_gain(
+        integral,
+        initial_weekly_gain(scenario["pre_hours"], scenario["post_hours"], scenario["productivity_multiplier"]),
+        retained
+    )
+    time_spent = time_costs(
+        scenario["num_participants"],
+        retained,
+        scenario["sessions_per_participant"],
+        scenario["avg_sessions_dropouts"],
+        scenario["session_duration"],
+        scenario["homework_hrs"],
+        scenario["prop_time_work"]
+    )
+    loss = dropout_loss(scenario["num_participants"], retained, scenario["disappointment_hours"])
+    return cost_metrics(
+        total_cost(scenario["sessions_per_participant"], scenario["cost_per_session"], scenario["num_participants"]),
+        net_hours(gross, time_spent, loss),
+        scenario["num_participants"],
+        retained,
+        scenario["baseline_org_yearly_clients"]
+    )
+
+# --- Vectorised evaluation over many scenarios ---
+TEXT_FIELDS = ("programme", "decay_model")
+NUMERIC_FIELDS = tuple(field for field in SCENARIO_FIELDS if field not in TEXT_FIELDS)
+
+def scenario_columns(scenarios):
+    # List of scenario dicts -> one array per field (None becomes NaN)
+    columns = {field: np.array([scenario[field] for scenario in scenarios], dtype=object) for field in TEXT_FIELDS}
+    for field in NUMERIC_FIELDS:
+        columns[field] = np.array(
+            [np.nan if scenario[field] is None else scenario[field] for scenario in scenarios], dtype=np.float64
+        )
+    return columns
+
+def decay_integral_array(
+    decay_model,
+    annual_decay_rate,
+    months_to_zero,
+    custom_month_3,
+    custom_month_6,
+    custom_month_9,
+    custom_month_12,
+    working_weeks,
+    benefit_weeks=None
+):
+    # Same result as decay_integral, element by element. Invalid exponential rates (0 or 1) give NaN instead of raising.
+    # benefit_weeks cuts the benefit off early (e.g. a client who starts late only benefits for part of the timeframe).
+    timeframe_weeks = timeframe_of_interest_weeks(np.asarray(working_weeks, dtype=np.float64))
+    if benefit_weeks is None:
+        benefit_weeks = timeframe_weeks
+    numeric = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (
+        annual_decay_rate, months_to_zero, custom_month_3, custom_month_6, custom_month_9, custom_month_12, working_weeks,
+        timeframe_weeks, benefit_weeks
+    )))
+    annual_decay_rate, months_to_zero, custom_month_3, custom_month_6, custom_month_9, custom_month_12, working_weeks = numeric[:7]
+    timeframe_weeks = numeric[7]
+    counted_weeks = np.clip(numeric[8], 0.0, timeframe_weeks)
+    decay_model = np.broadcast_to(np.asarray(decay_model, dtype=object), working_weeks.shape)
+    integral = np.zeros(working_weeks.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponential = decay_model == "Exponential Decay"
+        if exponential.any():
+            rate = annual_decay_rate[exponential]
+            weeks = working_weeks[exponential]
+            period = counted_weeks[exponential]
+            weekly_decay_factor = (1.0 - rate) ** (1.0 / weeks)
+            geometric = np.where(
+                np.abs(1.0 - weekly_decay_factor) < 1e-9,
+                period,
+                (1.0 - weekly_decay_factor ** period) / (1.0 - weekly_decay_factor)
+            )
+            valid_rate = (rate > 0) & (rate < 1)
+            values = np.where(valid_rate & (weeks > 0), geometric, np.where(weeks <= 0, 0.0, period))
+            integral[exponential] = np.where((rate == 0.0) | (rate == 1.0) | np.isnan(rate), np.nan, values)
+
+        linear = decay_model == "Linear Decay"
+        if linear.any():
+            weeks = working_weeks[linear]
+            months = months_to_zero[linear]
+            weeks_to_zero = (months / 12) * weeks
+            # Closed form of sum(1 - w / weeks_to_zero) for w in range(n)
+            n = np.floor(np.minimum(counted_weeks[linear], weeks_to_zero))
+            values = n - n * (n - 1) / (2 * weeks_to_zero)
+            integral[linear] = np.where((months > 0) & (weeks > 0), values, 0.0)
+
+    custom = decay_model == "Custom Curve"
+    if custom.any():
+        custom_rows = np.flatnonzero(custom)
+        control_x = np.array([0, 3, 6, 9, 12])
+        control_y = np.vstack([
+            np.ones(custom_rows.size),
+            custom_month_3[custom_rows], custom_month_6[custom_rows],
+            custom_month_9[custom_rows], custom_month_12[custom_rows],
+        ])
+        # Rows with the same whole number of weeks share their weekly sample points, so interpolate them together
+        whole_weeks = np.floor(timeframe_weeks[custom_rows])
+        for weeks_in_period in np.unique(whole_weeks).astype(int):
+            in_group = whole_weeks == weeks_in_period
+            if weeks_in_period == 0:
+                integral[custom_rows[in_group]] = counted_weeks[custom_rows[in_group]] * 0.5
+                continue
+            month_equiv = np.arange(weeks_in_period) / weeks_in_period * 12
+            weekly_points = np.clip(PchipInterpolator(control_x, control_y[:, in_group], axis=0)(month_equiv), 0, 1)
+            counted = np.arange(weeks_in_period)[:, None] < np.floor(counted_weeks[custom_rows[in_group]])[None, :]
+            integral[custom_rows[in_group]] = np.where(counted, weekly_points, 0.0).sum(axis=0)
+
+    return integral
+
+def initial_weekly_gain_array(pre_hours, post_hours, productivity_multiplier):
+    pre_hours = np.asarray(pre_hours, dtype=np.float64)
+    gain = np.asarray(post_hours, dtype=np.float64) * np.asarray(productivity_multiplier, dtype=np.float64)
+    return np.where(pre_hours == 0, gain, gain - pre_hours)
+
+def cost_metrics_array(total_cost, net_hours, num_participants, retained_clients):
+    # Vectorised cost_metrics; stages computed for a single scenario are broadcast to the others
+    num_participants = np.asarray(num_participants, dtype=np.float64)
+    cost, hours, retained = np.broadcast_arrays(total_cost, net_hours, retained_clients)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "Total Cost (Money Spent)": cost,
+            "Number of Productive Hours Bought": hours,
+            "Cost per Productive Hour Bought": np.where(hours != 0, cost / hours, np.nan),
+            "Cost per FTE": np.where(hours != 0, cost / (hours / FTE_HOURS_PER_YEAR), np.nan),
+            "Total Clients Seen": np.broadcast_to(num_participants, hours.shape),
+            "Clients Retained": retained,
+            "Net Hours Gained per Retained Client": np.where(retained > 0, hours / np.where(retained > 0, retained, 1), 0.0),
+        }
+
+def evaluate_scenario_columns(columns):
+    # Vectorised calculate_programme_metrics: every value in `columns` is an array (or scalar) over scenarios.
+    # Imported here because model_graph builds its stages from this module.
+    from model_graph import ColumnModelGraph
+    return ColumnModelGraph(columns).results()
@@ -0,0 +1,190 @@
+# Incremental recomputation of the programme model.
+# The model is laid out as a dependency graph:
+#
+#   inputs -> decay_integral ---------------------\
+#          -> initial_weekly_gain ----------------+-> gross_gain --\
+#          -> retained_clients -+-----------------/                 +-> net_hours -\
+#                               +-> time_costs ---------------------+               +-> cost_metrics
+#                               +-> dropout_loss -------------------/               |
+#          -> total_cost ---------------------------------------------------------/
+#
+# Intermediate values are memoised; changing an input only recomputes the stages downstream of it,
+# so e.g. a cost-per-session change never re-runs the decay integral.
+# ColumnModelGraph is the same graph over arrays of scenarios. Monte Carlo draws, break-even trials and
+# sensitivity nudges are evaluated as what-ifs on it: only the stages downstream of the varied inputs are
+# recomputed, and everything upstream is reused from the cached base scenario(s).
+
+import inspect
+from collections import defaultdict
+
+import numpy as np
+
+import model
+from model import default_scenario, SCENARIO_FIELDS, TEXT_FIELDS
+
+# Stage name -> function. Each function's parameter names are its dependencies.
+PROGRAMME_STAGES = {
+    "decay_integral": model.decay_integral,
+    "initial_weekly_gain": model.initial_weekly_gain,
+    "retained_clients": model.retained_clients,
+    "gross_gain": model.gross_gain,
+    "time_costs": model.time_costs,
+    "dropout_loss": model.dropout_loss,
+    "net_hours": model.net_hours,
+    "total_cost": model.total_cost,
+    "cost_metrics": model.cost_metrics,
+}
+
+# The same stages over arrays; the shared arithmetic stages already work element by element
+COLUMN_STAGES = {
+    **PROGRAMME_STAGES,
+    "decay_integral": model.decay_integral_array,
+    "initial_weekly_gain": model.initial_weekly_gain_array,
+    "cost_metrics": model.cost_metrics_array,
+}
+
+
+def _same(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        try:
+            return np.array_equal(a, b, equal_nan=True)
+        except TypeError: # Text columns can't be checked for NaN
+            return np.array_equal(a, b)
+    return a == b
+
+
+class ComputationGraph:
+    def __init__(self):
+        self._functions = {}
+        self._dependencies = {}
+        self._dependents = defaultdict(set)
+        self._values = {}
+        self._stale = set()
+        self.recompute_counts = defaultdict(int)
+
+    def add_input(self, name, value):
+        self._dependencies[name] = ()
+        self._values[name] = value
+
+    def add_node(self, name, func, dependencies=None):
+        if dependencies is None:
+            # Parameters with defaults are optional extras, not graph edges
+            dependencies = tuple(
+                param.name for param in inspect.signature(func).parameters.values()
+                if param.default is inspect.Parameter.empty
+            )
+        missing = [dep for dep in dependencies if dep not in self._dependencies]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on undefined node(s): {', '.join(missing)}.")
+        self._functions[name] = func
+        self._dependencies[name] = tuple(dependencies)
+        for dep in dependencies:
+            self._dependents[dep].add(name)
+        self._stale.add(name)
+
+    def set_inputs(self, values):
+        changed = []
+        for name, value in values.items():
+            if name in self._functions or name not in self._dependencies:
+                raise KeyError(f"'{name}' is not an input of this graph.")
+            if name not in self._values or not _same(self._values[name], value):
+                self._values[name] = value
+                changed.append(name)
+        self._invalidate(changed)
+        return changed
+
+    def _downstream(self, names):
+        found = set()
+        pending = list(names)
+        while pending:
+            for dependent in self._dependents[pending.pop()]:
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+        return found
+
+    def _invalidate(self, names):
+        self._stale |= self._downstream(names)
+
+    def get(self, name):
+        if name in self._stale:
+            args = [self.get(dep) for dep in self._dependencies[name]]
+            self._values[name] = self._functions[name](*args)
+            self._stale.discard(name)
+            self.recompute_counts[name] += 1
+        return self._values[name]
+
+    def evaluate(self, name, overrides):
+        # Value of `name` with some inputs replaced, leaving the graph itself unchanged. Stages that don't
+        # depend on the replaced inputs come from the cache; only the ones downstream are recomputed.
+        for input_name in overrides:
+            if input_name in self._functions or input_name not in self._dependencies:
+                raise KeyError(f"'{input_name}' is not an input of this graph.")
+        affected = self._downstream(overrides)
+        values = dict(overrides)
+
+        def value(node):
+            if node in values:
+                return values[node]
+            if node not in affected:
+                return self.get(node)
+            values[node] = self._functions[node](*(value(dep) for dep in self._dependencies[node]))
+            self.recompute_counts[node] += 1
+            return values[node]
+
+        return value(name)
+
+
+class ProgrammeModelGraph:
+    def __init__(self, scenario):
+        self.graph = ComputationGraph()
+        for field in SCENARIO_FIELDS:
+            self.graph.add_input(field, scenario[field])
+        for name, func in PROGRAMME_STAGES.items():
+            self.graph.add_node(name, func)
+
+    @classmethod
+    def for_programme(cls, programme, overrides=None):
+        return cls(default_scenario(programme, overrides))
+
+    def update(self, changes):
+        # Returns the inputs that actually changed
+        return self.graph.set_inputs(changes)
+
+    def results(self):
+        return self.graph.get("cost_metrics")
+
+    @property
+    def recompute_counts(self):
+        return dict(self.graph.recompute_counts)
+
+
+def _column(field, values):
+    return np.asarray(values, dtype=object if field in TEXT_FIELDS else np.float64)
+
+class ColumnModelGraph:
+    # columns: one array per scenario field, as from model.scenario_columns. A single base scenario
+    # (arrays of length one) broadcasts against what-if arrays of any length.
+    def __init__(self, columns):
+        self.graph = ComputationGraph()
+        for field in SCENARIO_FIELDS:
+            self.graph.add_input(field, _column(field, columns[field]))
+        for name, func in COLUMN_STAGES.items():
+            self.graph.add_node(name, func)
+
+    def update(self, changes):
+        return self.graph.set_inputs({field: _column(field, values) for field, values in changes.items()})
+
+    def stage(self, name):
+        return self.graph.get(name)
+
+    def results(self):
+        return self.graph.get("cost_metrics")
+
+    def results_with(self, changes):
+        # Metrics with some inputs replaced, e.g. Monte Carlo draws or one input swept over a grid
+        return self.graph.evaluate("cost_metrics", {field: _column(field, values) for field, values in changes.items()})
+
+    @property
+    def recompute_counts(self):
+        return dict(self.graph.recompute_counts)
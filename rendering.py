@@ -0,0 +1,146 @@
+# Keeping the data sent to the browser small.
+# Every rerun re-sends every chart and table over the websocket. Streamlit only skips an element when the
+# browser already holds a byte-for-byte identical copy, so tables get a fixed style id here rather than
+# pandas' random one. Low-bandwidth mode goes further: chart titles stop carrying slider values (an unchanged
+# spec lets the browser update a chart's data in place instead of rebuilding it), long lines are thinned to
+# what can be told apart on screen, and tables send raw numbers formatted by the browser instead of
+# styled HTML. The payload meter counts the bytes actually sent in each rerun. Streamlit has no public hook
+# for outgoing messages, so it wraps the script run context's private message queue (checked against
+# streamlit 1.66); on versions where that isn't there, the report just says it's unavailable.
+
+import re
+
+import numpy as np
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    get_script_run_ctx = None
+
+LEAN_RENDERING_KEY = "lean_rendering"
+PAYLOAD_METER_KEY = "payload_meter"
+CHART_WIDTH_PX = 800 # Roughly a chart in the wide layout; a bit wider than most screens show, so thinning errs on the safe side
+CHART_HEIGHT_PX = 300
+LINE_TOLERANCE_PX = 0.5 # Points whose removal moves the line by less than this are dropped
+
+
+def lean_rendering():
+    return bool(st.session_state.get(LEAN_RENDERING_KEY, False))
+
+
+# --- Payload meter ---
+class PayloadMeter:
+    # Wraps a script run context's queue and counts the serialized size of every message it sends
+    def __init__(self):
+        self.hashes = set()
+        self.previous_hashes = set()
+        self.start_run()
+
+    def start_run(self):
+        self.previous_hashes, self.hashes = self.hashes, set()
+        self.bytes_sent = 0
+        self.messages = 0
+        self.cache_hits = 0 # Elements the browser already had, sent as a reference
+        self.unchanged_bytes = 0 # Sent in full although identical to the previous run
+
+    def wrap(self, enqueue):
+        def counting_enqueue(msg):
+            size = msg.ByteSize()
+            self.bytes_sent += size
+            self.messages += 1
+            if msg.WhichOneof("type") == "ref_hash":
+                self.cache_hits += 1
+                self.hashes.add(msg.ref_hash)
+            elif msg.hash:
+                if msg.hash in self.previous_hashes:
+                    self.unchanged_bytes += size
+                self.hashes.add(msg.hash)
+            return enqueue(msg)
+        return counting_enqueue
+
+def start_payload_meter():
+    # Call once at the top of the script. The meter lives in the session; each rerun gets a fresh context to wrap.
+    # None when there's no running app or this Streamlit version doesn't have the queue being wrapped.
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    if ctx is None or not callable(getattr(ctx, "_enqueue", None)):
+        return None
+    meter = st.session_state.setdefault(PAYLOAD_METER_KEY, PayloadMeter())
+    if not getattr(ctx, "_payload_metered", False):
+        ctx._enqueue = meter.wrap(ctx._enqueue)
+        ctx._payload_metered = True
+    meter.start_run()
+    return meter
+
+def payload_summary(meter):
+    if meter is None:
+        return "Payload size is unavailable (no running app, or this Streamlit version can't be measured)."
+    summary = f"This rerun sent {meter.bytes_sent / 1024:,.1f} KB in {meter.messages:,} messages"
+    if meter.cache_hits:
+        summary += f", {meter.cache_hits:,} of them reused from the browser's cache"
+    if meter.unchanged_bytes:
+        summary += f"; {meter.unchanged_bytes / 1024:,.1f} KB was resent unchanged from the last rerun"
+    return summary + "."
+
+
+# --- Charts ---
+def _pixels(values, size_px, domain=None):
+    low, high = domain if domain is not None else (np.min(values), np.max(values))
+    if not high > low:
+        return np.zeros_like(values)
+    return (values - low) / (high - low) * size_px
+
+def screen_points(x, y, width_px=CHART_WIDTH_PX, height_px=CHART_HEIGHT_PX, y_domain=None, log_x=False, tolerance_px=LINE_TOLERANCE_PX):
+    # Indices of the points to keep so the line through them stays within tolerance_px of the full line
+    # (Ramer-Douglas-Peucker in screen coordinates). Points are taken in order; with log_x, x must be positive.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.size <= 2:
+        return np.arange(x.size)
+    px = _pixels(np.log10(x) if log_x else x, width_px)
+    py = _pixels(y, height_px, y_domain)
+    keep = np.zeros(x.size, dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, x.size - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        dx, dy = px[end] - px[start], py[end] - py[start]
+        length = np.hypot(dx, dy)
+        inner_x, inner_y = px[start + 1:end] - px[start], py[start + 1:end] - py[start]
+        if length > 0:
+            distances = np.abs(dx * inner_y - dy * inner_x) / length
+        else:
+            distances = np.hypot(inner_x, inner_y)
+        furthest = int(np.argmax(distances))
+        if distances[furthest] > tolerance_px:
+            middle = start + 1 + furthest
+            keep[middle] = True
+            segments += [(start, middle), (middle, end)]
+    return np.flatnonzero(keep)
+
+def thin_line_data(df, x, y, by=None, **screen_kwargs):
+    # screen_points for each line of a long-format frame (one line per value of `by`)
+    if by is None:
+        return df.iloc[screen_points(df[x], df[y], **screen_kwargs)]
+    kept = []
+    for value in df[by].unique():
+        positions = np.flatnonzero((df[by] == value).to_numpy())
+        group = df.iloc[positions]
+        kept.append(positions[screen_points(group[x], group[y], **screen_kwargs)])
+    return df.iloc[np.sort(np.concatenate(kept))]
+
+
+# --- Tables ---
+def _printf_format(python_format):
+    # '${:,.2f}' -> '$%,.2f', the browser-side equivalent used by st.column_config
+    return re.sub(r"\{:(,?)(\.\d+)?f\}", lambda match: f"%{match[1]}{match[2] or ''}f", python_format)
+
+def show_table(df, formats, key, height=None):
+    # A formatted table that stays byte-identical between reruns while its numbers don't change
+    if lean_rendering():
+        column_config = {column: st.column_config.NumberColumn(format=_printf_format(fmt)) for column, fmt in formats.items()}
+        st.dataframe(df, column_config=column_config, height=height or "auto")
+    else:
+        st.dataframe(df.style.set_uuid(key).format(formats, na_rep="N/A"), height=height or "auto")
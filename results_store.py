@@ -0,0 +1,261 @@
+# Columnar storage for large batches of model results.
+# Sweeps and uncertainty samples (see sampling.py) produce one row per scenario: the inputs plus every
+# output metric. They are written as a hive-partitioned dataset (one directory per programme) of Arrow IPC
+# or Parquet files. Arrow IPC files are left uncompressed so readers can memory-map them and only touch the
+# pages they scan; Parquet is smaller and better for handing to analysts. Reading always streams record
+# batches, with filters pushed down, into constant-memory summaries, so the app can aggregate result sets
+# far bigger than RAM. A writer starts a new run: it refuses a directory that already holds results unless
+# told to overwrite, in which case the old run's partitions are removed first (and nothing else).
+# Run with:  python results_store.py --out results --n 1000000 [--overwrite]
+
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from config import offerings
+from model import TEXT_FIELDS, NUMERIC_FIELDS, default_scenario, evaluate_scenario_columns, scenario_columns
+from model_graph import ColumnModelGraph
+from sampling import PER_HOUR_METRICS, default_uncertainty, sample_scenarios
+from streaming_stats import DEFAULT_PERCENTILES, MetricSummaries
+
+RESULT_FORMATS = {"arrow": ("ipc", "arrow"), "parquet": ("parquet", "parquet")} # name -> (pyarrow format, file extension)
+PARTITION_FIELD = "programme"
+DEFAULT_CHUNK_SIZE = 2 ** 16 # A power of two, as Sobol samples need
+DEFAULT_HISTOGRAM_BINS = 60
+DEFAULT_SUMMARY_METRICS = ("Cost per Productive Hour Bought", "Number of Productive Hours Bought")
+# Float32 keeps ~7 significant figures, far finer than the slider steps and the model's own accuracy, and
+# holds whole numbers exactly up to 16.7 million. The two totals that get summed and divided again are
+# kept at float64 so aggregate ratios match the app to the cent.
+FLOAT64_COLUMNS = ("Total Cost (Money Spent)", "Number of Productive Hours Bought")
+HOURS_METRIC = "Number of Productive Hours Bought"
+
+
+# --- Writing ---
+class ResultWriter:
+    # Each write_batch call adds one file per programme to the dataset at `path`
+    def __init__(self, path, format="arrow", float64_columns=FLOAT64_COLUMNS, parquet_compression="zstd", overwrite=False):
+        if format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format '{format}'. Choose one of: {', '.join(RESULT_FORMATS)}.")
+        _start_run(path, overwrite)
+        self.path = path
+        self.format = format
+        self.float64_columns = tuple(float64_columns)
+        self.batches_written = 0
+        self.rows_written = 0
+        pyarrow_format, _ = RESULT_FORMATS[format]
+        file_format = ds.IpcFileFormat() if pyarrow_format == "ipc" else ds.ParquetFileFormat()
+        if pyarrow_format == "ipc":
+            # Uncompressed, so the files can be memory-mapped and read without decoding
+            self.write_options = file_format.make_write_options(compression=None)
+        else:
+            self.write_options = file_format.make_write_options(compression=parquet_compression)
+        self.file_format = file_format
+
+    def _table(self, columns, results):
+        arrays = {}
+        for field in TEXT_FIELDS:
+            arrays[field] = pa.array(np.asarray(columns[field], dtype=object).astype(str)).dictionary_encode()
+        numeric = {field: columns[field] for field in NUMERIC_FIELDS}
+        numeric.update(results)
+        size = len(arrays[PARTITION_FIELD])
+        for name, values in numeric.items():
+            values = np.broadcast_to(np.asarray(values, dtype=np.float64), (size,))
+            arrays[name] = pa.array(values if name in self.float64_columns else values.astype(np.float32))
+        return pa.table(arrays)
+
+    def write_batch(self, columns, results=None):
+        # columns: model.scenario_columns output (or sampling.sample_scenarios); results default to evaluating them
+        if results is None:
+            results = evaluate_scenario_columns(columns)
+        table = self._table(columns, results)
+        _, extension = RESULT_FORMATS[self.format]
+        ds.write_dataset(
+            table,
+            self.path,
+            format=self.file_format,
+            file_options=self.write_options,
+            partitioning=[PARTITION_FIELD],
+            partitioning_flavor="hive",
+            basename_template=f"part-{self.batches_written:06d}-{{i}}.{extension}",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        self.batches_written += 1
+        self.rows_written += table.num_rows
+        return table.num_rows
+
+def _partitions(path):
+    prefix = f"{PARTITION_FIELD}="
+    return [os.path.join(path, name) for name in os.listdir(path) if name.startswith(prefix) and os.path.isdir(os.path.join(path, name))]
+
+def _start_run(path, overwrite):
+    # Part files are only named per batch, so a new run written over an old one would leave the old files to be read back
+    if not os.path.isdir(path):
+        return
+    previous = _partitions(path)
+    if previous and not overwrite:
+        raise ValueError(f"'{path}' already holds results. Write to a new directory or overwrite them.")
+    for partition in previous:
+        shutil.rmtree(partition)
+
+def chunk_sizes(n, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Full chunks, then the remainder split into powers of two (largest first) so every Sobol chunk stays balanced
+    if chunk_size < 1 or chunk_size & (chunk_size - 1):
+        raise ValueError("Chunk size must be a power of two.")
+    sizes = [chunk_size] * (n // chunk_size)
+    remainder = n % chunk_size
+    sizes += [1 << bit for bit in reversed(range(remainder.bit_length())) if remainder & (1 << bit)]
+    return sizes
+
+def write_results(path, columns, results=None, format="arrow", chunk_size=DEFAULT_CHUNK_SIZE, overwrite=False):
+    # One-off write of a set of scenario columns, split into chunks so no single file gets too big
+    writer = ResultWriter(path, format=format, overwrite=overwrite)
+    size = len(columns[PARTITION_FIELD])
+    for start in range(0, size, chunk_size):
+        rows = slice(start, start + chunk_size)
+        writer.write_batch(
+            {field: np.asarray(values)[rows] for field, values in columns.items()},
+            None if results is None else {metric: np.asarray(values)[rows] for metric, values in results.items()}
+        )
+    return writer.rows_written
+
+
+# --- Reading ---
+def _result_files(path):
+    # (pyarrow format, part files) of the run in `path`; anything else in the directory is left alone
+    for pyarrow_format, extension in RESULT_FORMATS.values():
+        files = sorted(
+            os.path.join(root, file_name)
+            for partition in _partitions(path)
+            for root, _, file_names in os.walk(partition)
+            for file_name in file_names if file_name.endswith(f".{extension}")
+        )
+        if files:
+            return pyarrow_format, files
+    raise ValueError(f"No result files found under '{path}'.")
+
+def open_results(path):
+    # Local files are memory-mapped, so scanning only pulls the needed pages of the needed columns into memory
+    pyarrow_format, files = _result_files(path)
+    return ds.dataset(
+        [os.path.abspath(file_path) for file_path in files],
+        format=pyarrow_format,
+        partitioning="hive",
+        partition_base_dir=os.path.abspath(path),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+def result_filter(programmes=None, decay_models=None, ranges=None):
+    # Filter expression pushed down into the scan: programmes / decay models to keep and
+    # {column: (low, high)} inclusive ranges. Returns None when nothing is filtered.
+    conditions = []
+    if programmes is not None:
+        conditions.append(pc.field(PARTITION_FIELD).isin(list(programmes)))
+    if decay_models is not None:
+        conditions.append(pc.field("decay_model").isin(list(decay_models)))
+    for column, (low, high) in (ranges or {}).items():
+        conditions.append((pc.field(column) >= low) & (pc.field(column) <= high))
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+def count_results(dataset, filter=None):
+    return dataset.count_rows(filter=filter)
+
+def _scan_columns(metrics):
+    # The hours column comes along whenever a per-hour metric has to be masked
+    columns = [PARTITION_FIELD] + list(metrics)
+    if HOURS_METRIC not in columns and any(metric in PER_HOUR_METRICS for metric in metrics):
+        columns.append(HOURS_METRIC)
+    return columns
+
+def _metric_values(batch, metric):
+    # Per-hour costs of draws that buy no productive hours are left out, as in sampling.estimate_percentiles
+    values = batch.column(metric).to_numpy(zero_copy_only=False)
+    if metric in PER_HOUR_METRICS:
+        values = np.where(batch.column(HOURS_METRIC).to_numpy(zero_copy_only=False) > 0, values, np.nan)
+    return values
+
+def summarise_results(dataset, metrics=DEFAULT_SUMMARY_METRICS, filter=None, percentiles=DEFAULT_PERCENTILES):
+    # Count, mean, std, min, max and percentiles per (programme, metric), one record batch at a time
+    summaries = MetricSummaries()
+    for batch in dataset.to_batches(columns=_scan_columns(metrics), filter=filter):
+        programmes = batch.column(PARTITION_FIELD).to_numpy(zero_copy_only=False).astype(str)
+        values = {metric: _metric_values(batch, metric) for metric in metrics}
+        for programme in np.unique(programmes):
+            rows = programmes == programme
+            for metric in metrics:
+                summaries.update(programme, metric, values[metric][rows])
+    return summaries.to_frame(percentiles)
+
+def result_histogram(dataset, metric, bins=DEFAULT_HISTOGRAM_BINS, filter=None, value_range=None):
+    # Counts per (programme, bin). Without a value_range, a first pass over the one column finds it.
+    if value_range is None:
+        low, high = np.inf, -np.inf
+        for batch in dataset.to_batches(columns=_scan_columns([metric])[1:], filter=filter):
+            values = _metric_values(batch, metric)
+            if not np.isnan(values).all():
+                low = min(low, float(np.nanmin(values)))
+                high = max(high, float(np.nanmax(values)))
+        if low > high:
+            return pd.DataFrame(columns=["Programme", "Bin Start", "Bin End", "Count"])
+        value_range = (low, high if high > low else low + 1)
+    edges = np.linspace(value_range[0], value_range[1], bins + 1)
+
+    counts = {}
+    for batch in dataset.to_batches(columns=_scan_columns([metric]), filter=filter):
+        programmes = batch.column(PARTITION_FIELD).to_numpy(zero_copy_only=False).astype(str)
+        values = _metric_values(batch, metric)
+        for programme in np.unique(programmes):
+            batch_counts, _ = np.histogram(values[programmes == programme], bins=edges)
+            counts[programme] = counts.get(programme, 0) + batch_counts
+    return pd.DataFrame([
+        {"Programme": programme, "Bin Start": edges[i], "Bin End": edges[i + 1], "Count": int(programme_counts[i])}
+        for programme, programme_counts in counts.items()
+        for i in range(bins)
+    ])
+
+
+# --- Writing an uncertainty sample for every programme ---
+def write_uncertainty_samples(
+    path, n, method="sobol", format="arrow", chunk_size=DEFAULT_CHUNK_SIZE, seed=None, programmes=None, overwrite=False
+):
+    # n draws per programme around its default scenario (see sampling.default_uncertainty), written in chunks
+    sizes = chunk_sizes(n, chunk_size)
+    writer = ResultWriter(path, format=format, overwrite=overwrite)
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(programmes or offerings) * len(sizes)))
+    for programme in programmes or offerings:
+        scenario = default_scenario(programme)
+        distributions = default_uncertainty(scenario)
+        # Stages that don't depend on the drawn inputs are computed once per programme
+        graph = ColumnModelGraph(scenario_columns([scenario]))
+        for size in sizes:
+            columns = sample_scenarios(scenario, distributions, size, method, next(seeds))
+            writer.write_batch(columns, graph.results_with({field: columns[field] for field in distributions}))
+    return writer.rows_written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write uncertainty samples of every programme as a columnar dataset.")
+    parser.add_argument("--out", required=True, help="Directory to write the dataset to.")
+    parser.add_argument("--n", type=int, default=1_000_000, help="Draws per programme.")
+    parser.add_argument("--method", default="sobol", choices=["random", "sobol", "lhs"])
+    parser.add_argument("--format", default="arrow", choices=list(RESULT_FORMATS))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per file; a power of two.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--overwrite", action="store_true", help="Replace the results already in --out.")
+    args = parser.parse_args()
+
+    rows = write_uncertainty_samples(
+        args.out, args.n, args.method, args.format, args.chunk_size, args.seed, overwrite=args.overwrite
+    )
+    print(f"Wrote {rows:,} rows to {args.out}")
@@ -0,0 +1,127 @@
+# Capacity-dependent costs and the scale frontier.
+# The programme tabs price every session the same, so cost grows in a straight line with participants.
+# At larger scale the org runs out of coach time: every extra coach is a one-off hiring cost and is paid
+# for a full caseload whether or not it's filled, every few coaches need another supervisor, and finding
+# each further participant costs more outreach. All costs are per year, like the direct cost, so hiring is
+# spread over the years a new coach is expected to stay. Coach time is counted in sessions booked (every
+# participant's full course), the same sessions the direct cost pays for, so a dropout's unused sessions
+# are neither idle capacity nor charged twice. Sharing the org's fixed costs pulls the other way, since
+# the share per participant falls as a programme grows. Every scale on a grid from tens to tens of
+# thousands of participants, for any number of scenarios, is costed in one vectorised pass; evaluating
+# each point at N and N + 1 participants gives the exact marginal cost, steps included.
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DEFAULT_NUM_COACHES,
+    DEFAULT_CASELOAD_PER_COACH,
+    DEFAULT_BASELINE_SESSIONS_PER_CLIENT,
+    DEFAULT_COACH_HIRING_COST,
+    DEFAULT_COACH_HIRING_AMORTISATION_YEARS,
+    DEFAULT_COACHES_PER_SUPERVISOR,
+    DEFAULT_SUPERVISOR_COST_PER_YEAR,
+    ORGANISATION_FIXED_COSTS,
+    programme_scale_costs,
+)
+from model import evaluate_scenario_columns, scenario_columns
+
+DEFAULT_SCALE_GRID = np.unique(np.round(np.geomspace(10, 50000, 400)))
+
+
+def scale_cost_parameters(programme, overrides=None):
+    parameters = {
+        "num_coaches": DEFAULT_NUM_COACHES,
+        "caseload_per_coach": DEFAULT_CASELOAD_PER_COACH,
+        "baseline_sessions_per_client": DEFAULT_BASELINE_SESSIONS_PER_CLIENT,
+        "coach_hiring_cost": DEFAULT_COACH_HIRING_COST,
+        "coach_hiring_amortisation_years": DEFAULT_COACH_HIRING_AMORTISATION_YEARS,
+        "coaches_per_supervisor": DEFAULT_COACHES_PER_SUPERVISOR,
+        "supervisor_cost_per_year": DEFAULT_SUPERVISOR_COST_PER_YEAR,
+        "other_programme_sessions": 0.0, # Sessions already taken by the other EA programmes
+        "include_fixed_cost_share": False,
+        **programme_scale_costs[programme],
+    }
+    if overrides:
+        unknown = [key for key in overrides if key not in parameters]
+        if unknown:
+            raise ValueError(f"Unknown scale cost parameter(s): {', '.join(sorted(unknown))}.")
+        parameters.update(overrides)
+    return parameters
+
+def sessions_booked(num_participants, sessions_per_participant):
+    # Coach time reserved for the programme: a full course per participant, as model.total_cost charges
+    return num_participants * sessions_per_participant
+
+def _capacity_costs(columns, parameters):
+    # Cost on top of the model's direct session cost. Every value in `columns` and `parameters` is an array over rows.
+    p = parameters
+    weeks = columns["working_weeks"]
+    sessions_per_coach = p["caseload_per_coach"] * weeks
+    used_elsewhere = columns["baseline_org_yearly_clients"] * p["baseline_sessions_per_client"] + p["other_programme_sessions"]
+    sessions = sessions_booked(columns["num_participants"], columns["sessions_per_participant"])
+    coaches_needed = np.ceil((used_elsewhere + sessions) / sessions_per_coach)
+    coaches_hired = np.maximum(coaches_needed - p["num_coaches"], 0)
+    # A new coach is paid for a full caseload; the slots nobody books still cost the session price
+    sessions_beyond_team = np.maximum(used_elsewhere + sessions - p["num_coaches"] * sessions_per_coach, 0)
+    idle_sessions = coaches_hired * sessions_per_coach - sessions_beyond_team
+    supervisors_hired = (
+        np.ceil((p["num_coaches"] + coaches_hired) / p["coaches_per_supervisor"]) -
+        np.ceil(p["num_coaches"] / p["coaches_per_supervisor"])
+    )
+    N = columns["num_participants"]
+    costs = {
+        "Idle Capacity Cost": idle_sessions * columns["cost_per_session"],
+        "Hiring Cost": coaches_hired * p["coach_hiring_cost"] / p["coach_hiring_amortisation_years"],
+        "Supervision Cost": supervisors_hired * p["supervisor_cost_per_year"],
+        # Integral of the rising marginal outreach cost from 0 to N participants
+        "Recruitment Cost": p["recruitment_cost_per_participant"] * (N + N ** 2 / (2 * p["recruitment_saturation"])),
+        "Fixed Cost Share": np.where(
+            p["include_fixed_cost_share"], ORGANISATION_FIXED_COSTS * N / (columns["baseline_org_yearly_clients"] + N), 0.0
+        ),
+    }
+    counts = {"Sessions Booked": sessions, "Coaches Hired": coaches_hired, "Supervisors Hired": supervisors_hired}
+    return costs, counts
+
+def scale_frontier(scenarios, participants=DEFAULT_SCALE_GRID, parameters=None):
+    # scenarios: list of scenario dicts; each is re-run at every participant count in `participants`.
+    # parameters: programme name -> overrides for scale_cost_parameters.
+    # Returns one row per (scenario, participant count).
+    participants = np.asarray(participants, dtype=np.float64)
+    base = scenario_columns(scenarios)
+    rows = len(scenarios) * participants.size
+    # Every scale at N and at N + 1, so the marginal cost comes out of the same pass
+    columns = {field: np.tile(np.repeat(values, participants.size), 2) for field, values in base.items()}
+    columns["num_participants"] = np.tile(participants, 2 * len(scenarios)) + np.repeat([0.0, 1.0], rows)
+    scenario_parameters = [
+        scale_cost_parameters(scenario["programme"], (parameters or {}).get(scenario["programme"])) for scenario in scenarios
+    ]
+    row_parameters = {
+        name: np.tile(np.repeat([p[name] for p in scenario_parameters], participants.size), 2)
+        for name in scenario_parameters[0]
+    }
+    results = evaluate_scenario_columns(columns)
+    cost_parts, counts = _capacity_costs(columns, row_parameters)
+
+    direct = np.asarray(results["Total Cost (Money Spent)"], dtype=np.float64)
+    totals = direct + sum(cost_parts.values())
+    hours = np.asarray(results["Number of Productive Hours Bought"], dtype=np.float64)
+    at_n, next_n = slice(0, rows), slice(rows, 2 * rows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal_cost = totals[next_n] - totals[at_n]
+        marginal_hours = hours[next_n] - hours[at_n]
+        df = pd.DataFrame({
+            "Programme": columns["programme"][at_n],
+            "Participants": columns["num_participants"][at_n],
+            "Sessions Booked": counts["Sessions Booked"][at_n],
+            "Coaches Hired": counts["Coaches Hired"][at_n],
+            "Supervisors Hired": counts["Supervisors Hired"][at_n],
+            "Direct Cost": direct[at_n],
+            **{name: values[at_n] for name, values in cost_parts.items()},
+            "Total Cost": totals[at_n],
+            "Net Prod. Hours": hours[at_n],
+            "Cost / Prod. Hr": np.where(hours[at_n] > 0, totals[at_n] / hours[at_n], np.nan),
+            "Marginal Cost / Participant": marginal_cost,
+            "Marginal Cost / Prod. Hr": np.where(marginal_hours > 0, marginal_cost / marginal_hours, np.nan),
+        })
+    return df
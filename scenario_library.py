@@ -0,0 +1,255 @@
+# Saved scenario library.
+# A scenario here is the whole app state: every programme tab's sliders plus the Model Parameters, read
+# straight from st.session_state by widget key. It packs into a short URL-safe code (fixed key order,
+# a presence bitmask, one byte for the decay model and a double per number, zlib-compressed, base64url)
+# that can go in a link or a local JSON library. Any set of saved scenarios is evaluated together in one
+# vectorised model pass, giving a table of every output metric side by side with differences from a
+# reference scenario, without rerunning the app for each.
+# The library is a single JSON file (EA_COACHING_SCENARIO_LIBRARY) shared by every session of the app;
+# there are no per-user libraries, so anyone using the app can load or delete any saved scenario.
+
+import base64
+import binascii
+import json
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from config import offerings, FTE_HOURS_PER_YEAR, INPUT_BOUNDS
+from model import DECAY_MODELS, DEFAULT_CUSTOM_CURVE_POINTS, default_scenario, evaluate_scenario_columns, scenario_columns
+
+CODE_VERSION = 1
+DEFAULT_LIBRARY_PATH = os.environ.get(
+    "EA_COACHING_SCENARIO_LIBRARY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_library.json")
+)
+TOTAL_ROW = "Total/Overall Average"
+CUSTOM_FIELDS = ("custom_month_3", "custom_month_6", "custom_month_9", "custom_month_12")
+
+# (widget key, scenario field, value kind, divisor from widget units to model units, as in the tabs)
+PROGRAMME_WIDGETS = (
+    ("decay_model_{tab}", "decay_model", "choice", 1),
+    ("annual_decay_{tab}", "annual_decay_rate", "float", 100.0),
+    ("months_to_zero_{tab}", "months_to_zero", "float", 1),
+    ("custom_3month_{tab}", "custom_month_3", "float", 100.0),
+    ("custom_6month_{tab}", "custom_month_6", "float", 100.0),
+    ("custom_9month_{tab}", "custom_month_9", "float", 100.0),
+    ("custom_12month_{tab}", "custom_month_12", "float", 100.0),
+    ("pre_hours_{tab}", "pre_hours", "int", 1),
+    ("post_hours_{tab}", "post_hours", "int", 1),
+    ("productivity_multiplier_{tab}", "productivity_multiplier", "float", 1),
+    ("retention_rate_{tab}", "retention_rate", "float", 100.0),
+    ("num_participants_{tab}", "num_participants", "int", 1),
+)
+MODEL_PARAMETER_WIDGETS = (
+    ("cost_per_session_global", "cost_per_session", "float", 1),
+    ("working_weeks_global", "working_weeks", "int", 1),
+    ("prop_time_work_global", "prop_time_work", "float", 100.0),
+    ("homework_hrs_global", "homework_hrs", "float", 1),
+    ("avg_sessions_dropouts_global", "avg_sessions_dropouts", "float", 1),
+    ("session_duration_global", "session_duration", "float", 1),
+    ("disappointment_hours_global", "disappointment_hours", "float", 1),
+    ("baseline_org_yearly_clients_global", "baseline_org_yearly_clients", "float", 1),
+)
+
+# Every saved widget key in code order. Codes depend on this order, so bump CODE_VERSION if it changes.
+STATE_KEYS = tuple(
+    (key.format(tab=tab), kind) for tab in offerings for key, _, kind, _ in PROGRAMME_WIDGETS
+) + tuple((key, kind) for key, _, kind, _ in MODEL_PARAMETER_WIDGETS)
+STATE_KINDS = dict(STATE_KEYS)
+# Widget key -> (field, divisor), for checking values against config.INPUT_BOUNDS
+STATE_FIELDS = {
+    **{key.format(tab=tab): (field, divisor) for tab in offerings for key, field, _, divisor in PROGRAMME_WIDGETS},
+    **{key: (field, divisor) for key, field, _, divisor in MODEL_PARAMETER_WIDGETS},
+}
+
+
+# --- Capture and restore ---
+def capture_app_state(session_state):
+    # Widget values currently in session state; widgets that aren't shown (e.g. the other decay models' sliders) are left out
+    return {key: session_state[key] for key, _ in STATE_KEYS if key in session_state}
+
+def restore_app_state(session_state, state):
+    # Must run before the widgets are drawn (a button callback, or the top of the script)
+    for key, value in validate_state(state).items():
+        session_state[key] = value
+
+def validate_state(state):
+    # Only known widget keys, each with a value its widget accepts; raises ValueError otherwise.
+    # Widgets reject out-of-range values outright, so an edited or outdated code is refused rather than half-loaded.
+    valid = {}
+    for key, value in state.items():
+        kind = STATE_KINDS.get(key)
+        if kind is None:
+            continue
+        if kind == "choice":
+            if value not in DECAY_MODELS:
+                raise ValueError(f"'{value}' isn't a decay model (in {key}).")
+            valid[key] = value
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{key} must be a number.")
+        if kind == "int":
+            if value != int(value):
+                raise ValueError(f"{key} must be a whole number.")
+            value = int(value)
+        field, divisor = STATE_FIELDS[key]
+        low, high = INPUT_BOUNDS[field]
+        # Compared in the widget's own units (e.g. percent), where the limits are exact
+        if (low is not None and value < low * divisor) or (high is not None and value > high * divisor):
+            limits = f"{low * divisor:g} to {high * divisor:g}" if high is not None else f"at least {low * divisor:g}"
+            raise ValueError(f"{key} is {value:g}, outside the allowed range ({limits}).")
+        valid[key] = value
+    return valid
+
+
+# --- Compact encoding ---
+def encode_state(state):
+    present = [key in state for key, _ in STATE_KEYS]
+    bitmask = np.packbits(np.array(present, dtype=np.uint8)).tobytes()
+    values = bytearray()
+    for (key, kind), is_present in zip(STATE_KEYS, present):
+        if not is_present:
+            continue
+        if kind == "choice":
+            values += struct.pack("<B", DECAY_MODELS.index(state[key]))
+        else:
+            values += struct.pack("<d", state[key])
+    payload = zlib.compress(struct.pack("<B", CODE_VERSION) + bitmask + bytes(values), 9)
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_state(code):
+    try:
+        payload = zlib.decompress(base64.urlsafe_b64decode(code.strip() + "=" * (-len(code.strip()) % 4)))
+    except (binascii.Error, zlib.error, ValueError) as e:
+        raise ValueError("Not a valid scenario code.") from e
+    if not payload or payload[0] != CODE_VERSION:
+        raise ValueError("This scenario code was made by a different version of the app.")
+    bitmask_size = (len(STATE_KEYS) + 7) // 8
+    present = np.unpackbits(np.frombuffer(payload[1:1 + bitmask_size], dtype=np.uint8))[:len(STATE_KEYS)]
+    offset = 1 + bitmask_size
+    state = {}
+    try:
+        for (key, kind), is_present in zip(STATE_KEYS, present):
+            if not is_present:
+                continue
+            if kind == "choice":
+                (index,) = struct.unpack_from("<B", payload, offset)
+                state[key] = DECAY_MODELS[index]
+                offset += 1
+            else:
+                (value,) = struct.unpack_from("<d", payload, offset)
+                # Integer widgets reject floats when their value is restored
+                state[key] = int(value) if kind == "int" else value
+                offset += 8
+    except (struct.error, IndexError) as e:
+        raise ValueError("Not a valid scenario code.") from e
+    return validate_state(state)
+
+
+# --- Local library (name -> code, stored as JSON) ---
+def load_library(path=DEFAULT_LIBRARY_PATH):
+    # A damaged file raises ValueError rather than being treated as empty, so saving can't overwrite it
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            library = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"The saved scenario library at '{path}' can't be read ({e}). Fix or remove the file.") from e
+    if not isinstance(library, dict) or not all(isinstance(name, str) and isinstance(code, str) for name, code in library.items()):
+        raise ValueError(f"The saved scenario library at '{path}' isn't a list of named scenario codes. Fix or remove the file.")
+    return library
+
+def _write_library(library, path):
+    # Write then rename, so a crash never leaves a half-written library
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(library, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+def save_to_library(name, code, path=DEFAULT_LIBRARY_PATH):
+    if not name.strip():
+        raise ValueError("A saved scenario needs a name.")
+    decode_state(code)
+    library = load_library(path)
+    library[name.strip()] = code
+    _write_library(library, path)
+    return library
+
+def delete_from_library(name, path=DEFAULT_LIBRARY_PATH):
+    library = load_library(path)
+    library.pop(name, None)
+    _write_library(library, path)
+    return library
+
+
+# --- Batch comparison ---
+def state_to_scenarios(state):
+    # programme name -> scenario dict, built the same way as the programme tabs build theirs
+    globals_ = {field: state[key] / divisor for key, field, _, divisor in MODEL_PARAMETER_WIDGETS if key in state}
+    scenarios = {}
+    for tab in offerings:
+        widget_values = {}
+        for key, field, kind, divisor in PROGRAMME_WIDGETS:
+            key = key.format(tab=tab)
+            if key in state:
+                widget_values[field] = state[key] if kind == "choice" else state[key] / divisor
+        scenario = default_scenario(tab, {**globals_, **widget_values})
+        # Only the chosen decay model's inputs are taken from the tab; the others keep the tab's behaviour
+        decay_model = scenario["decay_model"]
+        if decay_model != "Exponential Decay":
+            scenario["annual_decay_rate"] = None
+        if decay_model != "Linear Decay":
+            scenario["months_to_zero"] = None
+        if decay_model != "Custom Curve":
+            scenario.update({field: DEFAULT_CUSTOM_CURVE_POINTS[field[len("custom_"):]] for field in CUSTOM_FIELDS})
+        scenarios[tab] = scenario
+    return scenarios
+
+def compare_scenarios(states, reference=None):
+    # states: scenario name -> app state (see capture_app_state / decode_state).
+    # Returns one column per scenario and, for each other scenario, its difference from the reference
+    # (the first scenario unless given), with rows for every (programme, metric) plus the overall total.
+    names = list(states)
+    if not names:
+        raise ValueError("Nothing to compare.")
+    reference = names[0] if reference is None else reference
+    if reference not in states:
+        raise ValueError(f"Unknown reference scenario '{reference}'.")
+    programmes = list(offerings)
+    scenarios = [state_to_scenarios(states[name])[programme] for name in names for programme in programmes]
+    results = evaluate_scenario_columns(scenario_columns(scenarios))
+
+    shape = (len(names), len(programmes))
+    values = {metric: np.asarray(column, dtype=np.float64).reshape(shape) for metric, column in results.items()}
+    # Overall total, as in the Overall tab: sums for counts and money, ratios recomputed from the sums
+    totals = {metric: values[metric].sum(axis=1) for metric in (
+        "Total Cost (Money Spent)", "Number of Productive Hours Bought", "Total Clients Seen", "Clients Retained"
+    )}
+    cost, hours, retained = totals["Total Cost (Money Spent)"], totals["Number of Productive Hours Bought"], totals["Clients Retained"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        totals["Cost per Productive Hour Bought"] = np.where(hours > 0, cost / hours, np.nan)
+        totals["Cost per FTE"] = np.where(hours > 0, cost / (hours / FTE_HOURS_PER_YEAR), np.nan)
+        totals["Net Hours Gained per Retained Client"] = np.where(retained > 0, hours / retained, np.nan)
+
+    rows = {}
+    for i, programme in enumerate(programmes):
+        for metric in results:
+            rows[(programme, metric)] = values[metric][:, i]
+    for metric in results:
+        rows[(TOTAL_ROW, metric)] = totals[metric]
+    df = pd.DataFrame.from_dict(rows, orient="index", columns=names)
+    df.index = pd.MultiIndex.from_tuples(df.index, names=["Programme", "Metric"])
+
+    for name in names:
+        if name == reference:
+            continue
+        df[f"{name} − {reference}"] = df[name] - df[reference]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df[f"{name} vs {reference} (%)"] = np.where(df[reference] != 0, (df[name] / df[reference] - 1) * 100, np.nan)
+    return df
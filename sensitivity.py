@@ -0,0 +1,189 @@
+# Analytic sensitivities of the programme model.
+# Net hours bought is H = g * I * R - time costs - dropout loss and the cost is sessions x price x participants,
+# all simple closed forms, so exact derivatives of H and of Cost / Prod. Hr = cost / H with respect to every
+# input come straight from the chain rule, vectorised over scenarios. The one exception is the Custom Curve
+# control points: PCHIP's slope limiter makes their derivative piecewise, so those use a central difference
+# on the decay integral alone. Working weeks is a whole number in the app and each extra week adds a whole
+# week to the timeframe, so its sensitivity is the exact change from one more week rather than a derivative.
+# The base results, the decay integral and that extra week all come from one model graph, so the extra week
+# only recomputes the stages downstream of working weeks.
+
+import numpy as np
+import pandas as pd
+
+from config import DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS
+from model import (
+    NUMERIC_FIELDS,
+    SIGN_UP_HOURS_PER_PARTICIPANT,
+    decay_integral_array,
+    scenario_columns,
+)
+from model_graph import ColumnModelGraph
+
+CUSTOM_POINT_FIELDS = ("custom_month_3", "custom_month_6", "custom_month_9", "custom_month_12")
+CUSTOM_POINT_STEP = 1e-4
+
+# How each input is shown in the app: (label, scale from model units to one slider unit)
+INPUT_DISPLAY = {
+    "annual_decay_rate": ("Annual decay rate (per 1 pt)", 0.01),
+    "months_to_zero": ("Months until effect is zero", 1.0),
+    "custom_month_3": ("Benefit at 3 months (per 1 pt)", 0.01),
+    "custom_month_6": ("Benefit at 6 months (per 1 pt)", 0.01),
+    "custom_month_9": ("Benefit at 9 months (per 1 pt)", 0.01),
+    "custom_month_12": ("Benefit at 12 months (per 1 pt)", 0.01),
+    "pre_hours": ("Pre-intervention hours", 1.0),
+    "post_hours": ("Post-intervention hours", 1.0),
+    "productivity_multiplier": ("Productivity multiplier (per 0.01)", 0.01),
+    "retention_rate": ("Retention rate (per 1 pt)", 0.01),
+    "num_participants": ("Participants", 1.0),
+    "sessions_per_participant": ("Sessions per participant", 1.0),
+    "cost_per_session": ("Cost per session ($)", 1.0),
+    "working_weeks": ("Working weeks per year", 1.0),
+    "prop_time_work": ("Time during work hours (per 1 pt)", 0.01),
+    "homework_hrs": ("Homework hours per session", 1.0),
+    "avg_sessions_dropouts": ("Sessions completed by dropouts", 1.0),
+    "session_duration": ("Session duration (hours)", 1.0),
+    "disappointment_hours": ("Disappointment hours per dropout", 1.0),
+    "baseline_org_yearly_clients": ("Org baseline yearly clients", 1.0),
+}
+
+
+def _decay_integral_gradients(columns):
+    # dI/dx for the decay integral I (hours per hour of initial weekly gain)
+    decay_model = np.asarray(columns["decay_model"], dtype=object)
+    rate = np.asarray(columns["annual_decay_rate"], dtype=np.float64)
+    months_to_zero = np.asarray(columns["months_to_zero"], dtype=np.float64)
+    weeks = np.asarray(columns["working_weeks"], dtype=np.float64)
+    timeframe_fraction = DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS / 12
+    timeframe_weeks = timeframe_fraction * weeks
+    gradients = {field: np.zeros(weeks.shape) for field in ("annual_decay_rate", "months_to_zero") + CUSTOM_POINT_FIELDS}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Exponential: I = (1 - f^T) / (1 - f) with f = (1 - rate)^(1/W) and T = W * timeframe_fraction
+        exponential = (decay_model == "Exponential Decay") & (rate > 0) & (rate < 1) & (weeks > 0)
+        f = (1.0 - rate) ** (1.0 / weeks)
+        f_T = (1.0 - rate) ** timeframe_fraction
+        df_drate = -f / (weeks * (1.0 - rate))
+        df_T_drate = -timeframe_fraction * (1.0 - rate) ** (timeframe_fraction - 1)
+        dI_drate = (-df_T_drate * (1.0 - f) + (1.0 - f_T) * df_drate) / (1.0 - f) ** 2
+        gradients["annual_decay_rate"] = np.where(exponential, dI_drate, 0.0)
+
+        # Linear: I = n - n(n - 1) / (2 Z) with Z = months_to_zero / 12 * W; n (whole weeks) is locally constant
+        linear = (decay_model == "Linear Decay") & (months_to_zero > 0) & (weeks > 0)
+        weeks_to_zero = months_to_zero / 12 * weeks
+        n = np.floor(np.minimum(timeframe_weeks, weeks_to_zero))
+        dI_dZ = n * (n - 1) / (2 * weeks_to_zero ** 2)
+        gradients["months_to_zero"] = np.where(linear, dI_dZ * weeks / 12, 0.0)
+
+    custom = decay_model == "Custom Curve"
+    if custom.any():
+        rows = np.flatnonzero(custom)
+        points = {field: np.asarray(columns[field], dtype=np.float64)[rows] for field in CUSTOM_POINT_FIELDS}
+        for field in CUSTOM_POINT_FIELDS:
+            shifted = {}
+            for direction in (1, -1):
+                trial = dict(points)
+                trial[field] = points[field] + direction * CUSTOM_POINT_STEP
+                shifted[direction] = decay_integral_array(
+                    "Custom Curve", np.nan, np.nan,
+                    trial["custom_month_3"], trial["custom_month_6"], trial["custom_month_9"], trial["custom_month_12"],
+                    weeks[rows]
+                )
+            gradients[field][rows] = (shifted[1] - shifted[-1]) / (2 * CUSTOM_POINT_STEP)
+    return gradients
+
+def _columns_and_graph(scenarios):
+    columns = scenario_columns(scenarios) if isinstance(scenarios, (list, tuple)) else dict(scenarios)
+    return columns, ColumnModelGraph(columns)
+
+def gradients(scenarios):
+    # scenarios: list of scenario dicts or model.scenario_columns output.
+    # Returns {input: {"Number of Productive Hours Bought": dH/dx, "Cost per Productive Hour Bought": dY/dx}}
+    return _gradients(*_columns_and_graph(scenarios))
+
+def _gradients(columns, graph):
+    value = {field: np.asarray(columns[field], dtype=np.float64) for field in NUMERIC_FIELDS}
+    results = graph.results()
+    H = results["Number of Productive Hours Bought"]
+    cost = results["Total Cost (Money Spent)"]
+
+    N = value["num_participants"]
+    r = value["retention_rate"]
+    R = N * r
+    s = value["sessions_per_participant"]
+    a = value["avg_sessions_dropouts"]
+    p = value["prop_time_work"]
+    d = value["disappointment_hours"]
+    sh = value["session_duration"] + value["homework_hrs"]
+    pre, post, m = value["pre_hours"], value["post_hours"], value["productivity_multiplier"]
+    # pre_hours = 0 gives the same gain as the general formula, so dg/dpre = -1 everywhere
+    g = post * m - pre
+    I = graph.stage("decay_integral")
+    dI = _decay_integral_gradients(columns)
+
+    dH = {field: np.zeros(H.shape) for field in NUMERIC_FIELDS}
+    dH["post_hours"] = m * I * R
+    dH["productivity_multiplier"] = post * I * R
+    dH["pre_hours"] = -I * R
+    dH["retention_rate"] = N * (g * I - s * sh * p + a * sh * p + d)
+    dH["num_participants"] = r * g * I - r * s * sh * p - (1 - r) * a * sh * p - SIGN_UP_HOURS_PER_PARTICIPANT * p - (1 - r) * d
+    dH["sessions_per_participant"] = -R * sh * p
+    dH["avg_sessions_dropouts"] = -(N - R) * sh * p
+    dH["session_duration"] = -(R * s + (N - R) * a) * p
+    dH["homework_hrs"] = dH["session_duration"]
+    dH["prop_time_work"] = -(R * s * sh + (N - R) * a * sh + N * SIGN_UP_HOURS_PER_PARTICIPANT)
+    dH["disappointment_hours"] = -(N - R)
+    for field, dI_dx in dI.items():
+        dH[field] = g * R * dI_dx
+
+    dcost = {field: np.zeros(H.shape) for field in NUMERIC_FIELDS}
+    dcost["cost_per_session"] = s * N
+    dcost["sessions_per_participant"] = value["cost_per_session"] * N
+    dcost["num_participants"] = s * value["cost_per_session"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grads = {
+            field: {
+                "Number of Productive Hours Bought": dH[field],
+                # Quotient rule on cost / H
+                "Cost per Productive Hour Bought": np.where(H != 0, (dcost[field] * H - cost * dH[field]) / H ** 2, np.nan),
+            }
+            for field in NUMERIC_FIELDS
+        }
+    next_week_results = graph.results_with({"working_weeks": value["working_weeks"] + 1})
+    grads["working_weeks"] = {metric: next_week_results[metric] - results[metric] for metric in grads["working_weeks"]}
+    return grads
+
+def elasticities(scenarios):
+    # % change in each metric per 1% change in each input
+    columns, graph = _columns_and_graph(scenarios)
+    return _elasticities(columns, graph, _gradients(columns, graph))
+
+def _elasticities(columns, graph, grads):
+    results = graph.results()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            field: {
+                metric: grads[field][metric] * np.asarray(columns[field], dtype=np.float64) / results[metric]
+                for metric in grads[field]
+            }
+            for field in grads
+        }
+
+def sensitivity_table(scenario):
+    # One scenario's sensitivities in slider units, for display
+    columns, graph = _columns_and_graph([scenario])
+    grads = _gradients(columns, graph)
+    elastic = _elasticities(columns, graph, grads)
+    rows = {}
+    for field, (label, scale) in INPUT_DISPLAY.items():
+        dH = grads[field]["Number of Productive Hours Bought"][0]
+        dY = grads[field]["Cost per Productive Hour Bought"][0]
+        if dH == 0 and dY == 0:
+            continue
+        rows[label] = {
+            "Net Prod. Hours Bought": dH * scale,
+            "Cost / Prod. Hr": dY * scale,
+            "Elasticity of Cost / Prod. Hr": elastic[field]["Cost per Productive Hour Bought"][0],
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
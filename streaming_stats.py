@@ -0,0 +1,221 @@
+# Streaming summaries for simulation output.
+# Percentiles of Cost / Prod. Hr and Net Prod. Hours Bought are estimated from a mergeable
+# t-digest style quantile sketch plus exact running moments, so memory stays constant however many
+# draws are fed in. Sketches from parallel shards merge into one summary. Raw draws can optionally be
+# spilled to a float32 file on disk and memory-mapped back for exact checks.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COMPRESSION = 200       # Higher keeps more centroids: more accurate, more memory
+DEFAULT_BUFFER_SIZE = 10000     # Draws held before they are folded into the centroids
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        batch = RunningMoments()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        # Chan et al. parallel update of mean and sum of squared deviations
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class QuantileSketch:
+    def __init__(self, compression=DEFAULT_COMPRESSION, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def merge(self, other):
+        other._flush()
+        self._flush()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        draws = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._compress(np.concatenate([self.means, draws]), np.concatenate([self.weights, np.ones(draws.size)]))
+
+    def _compress(self, means, weights):
+        if means.size == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        # k1 scale function: centroids are small near the tails and large around the median.
+        # Everything whose left edge falls in the same unit of k shares one centroid.
+        q_left = (cumulative - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bins = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        self._flush()
+        q = np.asarray(q, dtype=np.float64)
+        if self.weights.size == 0:
+            return np.full(q.shape, np.nan)
+        cumulative = np.cumsum(self.weights)
+        total = cumulative[-1]
+        # Each centroid sits at the middle of the weight it represents; the observed extremes pin the ends
+        mids = (cumulative - self.weights / 2) / total
+        positions = np.concatenate([[0.0], mids, [1.0]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q, positions, values)
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        return self.quantile(np.asarray(percentiles, dtype=np.float64) / 100.0)
+
+
+class StreamingSummary:
+    def __init__(self, compression=DEFAULT_COMPRESSION, spill_path=None):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(compression=compression)
+        self.spill_path = spill_path
+        if spill_path is not None:
+            # A summary owns its spill file: start it empty so an earlier run's draws never mix in
+            open(spill_path, "wb").close()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.moments.update(values)
+        self.sketch.update(values)
+        if self.spill_path is not None:
+            with open(self.spill_path, "ab") as spill_file:
+                values.astype(np.float32).tofile(spill_file)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        if self.spill_path is not None and other.spill_path is not None and other.spill_path != self.spill_path:
+            with open(self.spill_path, "ab") as spill_file:
+                other.spilled_draws().tofile(spill_file)
+        return self
+
+    def spilled_draws(self):
+        # Memory-mapped, so even very long runs can be sliced without loading them into RAM
+        if self.spill_path is None or not os.path.exists(self.spill_path) or os.path.getsize(self.spill_path) == 0:
+            return np.empty(0, dtype=np.float32)
+        return np.memmap(self.spill_path, dtype=np.float32, mode="r")
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        row = {
+            "Draws": self.moments.count,
+            "Mean": self.moments.mean if self.moments.count else np.nan,
+            "Std": self.moments.std,
+            "Min": self.moments.min if self.moments.count else np.nan,
+            "Max": self.moments.max if self.moments.count else np.nan,
+        }
+        for p, value in zip(percentiles, self.sketch.percentiles(percentiles)):
+            row[f"P{p:g}"] = value
+        return row
+
+
+class MetricSummaries:
+    # One StreamingSummary per (programme, metric), e.g. ("Insomnia", "Cost per Productive Hour Bought").
+    # Spill files are emptied when a summary is created, so give each live set of summaries (e.g. each shard) its own spill_dir.
+    def __init__(self, compression=DEFAULT_COMPRESSION, spill_dir=None):
+        self.compression = compression
+        self.spill_dir = spill_dir
+        self.summaries = {}
+
+    def _summary_for(self, programme, metric):
+        key = (programme, metric)
+        if key not in self.summaries:
+            spill_path = None
+            if self.spill_dir is not None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                file_name = f"{programme}__{metric}.f32".replace(" ", "_").replace("/", "_")
+                spill_path = os.path.join(self.spill_dir, file_name)
+            self.summaries[key] = StreamingSummary(compression=self.compression, spill_path=spill_path)
+        return self.summaries[key]
+
+    def update(self, programme, metric, values):
+        self._summary_for(programme, metric).update(values)
+
+    def update_results(self, programme, results):
+        # results: metric name -> array of draws, e.g. the output of a vectorised model run
+        for metric, values in results.items():
+            if np.issubdtype(np.asarray(values).dtype, np.number):
+                self.update(programme, metric, values)
+
+    def merge(self, other):
+        for (programme, metric), summary in other.summaries.items():
+            self._summary_for(programme, metric).merge(summary)
+        return self
+
+    def to_frame(self, percentiles=DEFAULT_PERCENTILES):
+        rows = {key: summary.summary(percentiles) for key, summary in self.summaries.items()}
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        if not df.empty:
+            df.index = pd.MultiIndex.from_tuples(df.index, names=["Programme", "Metric"])
+        return df
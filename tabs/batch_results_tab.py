@@ -0,0 +1,107 @@
+import os
+from urllib.parse import unquote
+
+import altair as alt
+import numpy as np
+import streamlit as st
+
+from model import DECAY_MODELS
+from results_store import (
+    PARTITION_FIELD,
+    count_results,
+    open_results,
+    result_filter,
+    result_histogram,
+    summarise_results,
+)
+from sampling import PER_HOUR_METRICS
+
+# Viewers can only browse result sets in this directory (or directly inside it), never an arbitrary path
+DEFAULT_RESULTS_DIR = os.environ.get("EA_COACHING_RESULTS_DIR", "results")
+BROWSABLE_METRICS = [
+    "Cost per Productive Hour Bought",
+    "Number of Productive Hours Bought",
+    "Cost per FTE",
+    "Net Hours Gained per Retained Client",
+    "Total Cost (Money Spent)",
+]
+SUMMARY_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def _dataset_version(path):
+    # Newest file time under `path`, so cached summaries are refreshed when more results are written
+    return max(
+        (os.path.getmtime(os.path.join(root, file_name)) for root, _, files in os.walk(path) for file_name in files),
+        default=0.0
+    )
+
+def _programmes_in(path):
+    prefix = f"{PARTITION_FIELD}="
+    return sorted(unquote(name[len(prefix):]) for name in os.listdir(path) if name.startswith(prefix))
+
+def _result_sets(root):
+    # The results directory and each directory directly inside it that holds programme results
+    if not os.path.isdir(root):
+        return []
+    subdirectories = sorted(
+        os.path.join(root, name) for name in os.listdir(root)
+        if not name.startswith(f"{PARTITION_FIELD}=") and os.path.isdir(os.path.join(root, name))
+    )
+    return [path for path in [root] + subdirectories if _programmes_in(path)]
+
+# Scans are cached on the directory and its newest file time; the datasets themselves are memory-mapped on each scan
+@st.cache_data(show_spinner="Scanning results...", max_entries=32)
+def _summary(path, version, programmes, decay_models, metric):
+    dataset = open_results(path)
+    result_set_filter = result_filter(programmes, decay_models)
+    return count_results(dataset, result_set_filter), summarise_results(
+        dataset, metrics=(metric,), filter=result_set_filter, percentiles=SUMMARY_PERCENTILES
+    )
+
+@st.cache_data(show_spinner="Binning results...", max_entries=32)
+def _histogram(path, version, programmes, decay_models, metric, value_range):
+    return result_histogram(open_results(path), metric, filter=result_filter(programmes, decay_models), value_range=value_range)
+
+def display_batch_results():
+    st.header("Batch Results")
+    st.markdown(f"Explore large sweeps or uncertainty samples saved as a columnar dataset in `{DEFAULT_RESULTS_DIR}` or a directory inside it (e.g. `python results_store.py --out {DEFAULT_RESULTS_DIR}/sweep`). Files are memory-mapped and scanned in batches, so result sets bigger than memory still work.")
+
+    result_sets = _result_sets(DEFAULT_RESULTS_DIR)
+    if not result_sets:
+        st.info(f"No programme results found in '{DEFAULT_RESULTS_DIR}'.")
+        return
+    path = st.selectbox("Result set", options=result_sets, key="batch_results_path")
+    all_programmes = _programmes_in(path)
+
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with filter_col1:
+        programmes = st.multiselect("Programmes", options=all_programmes, default=all_programmes, key="batch_results_programmes")
+    with filter_col2:
+        decay_models = st.multiselect("Decay models", options=DECAY_MODELS, default=DECAY_MODELS, key="batch_results_decay_models")
+    with filter_col3:
+        metric = st.selectbox("Metric", options=BROWSABLE_METRICS, key="batch_results_metric")
+    if not programmes or not decay_models:
+        st.info("Pick at least one programme and one decay model.")
+        return
+
+    version = _dataset_version(path)
+    rows, summary = _summary(path, version, tuple(programmes), tuple(decay_models), metric)
+    st.caption(f"{rows:,} result rows match." + (" Rows that buy no productive hours are left out of per-hour costs." if metric in PER_HOUR_METRICS else ""))
+    if summary.empty:
+        return
+    summary = summary.xs(metric, level="Metric")
+    st.dataframe(summary.style.set_uuid("batch_results_summary").format("{:,.2f}", na_rep="N/A").format("{:,.0f}", subset=["Draws"]))
+
+    # Bin between the 1st and 99th percentiles so a few near-zero-hour outliers don't flatten the chart
+    value_range = (float(np.nanmin(summary["P1"])), float(np.nanmax(summary["P99"])))
+    if not value_range[0] < value_range[1]:
+        return
+    histogram = _histogram(path, version, tuple(programmes), tuple(decay_models), metric, value_range)
+    chart = alt.Chart(histogram).mark_bar(opacity=0.6).encode(
+        x=alt.X("Bin Start:Q", title=metric),
+        x2="Bin End:Q",
+        y=alt.Y("Count:Q", title="Results", stack=None),
+        color="Programme:N",
+        tooltip=["Programme", "Bin Start", "Bin End", "Count"]
+    ).properties(title=f"Distribution of {metric} (1st to 99th percentile)", height=300)
+    st.altair_chart(chart, use_container_width=True)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from capacity_sim import capacity_adjusted_metrics, simulate_capacity
+from config import DEFAULT_NUM_COACHES, DEFAULT_CASELOAD_PER_COACH, DEFAULT_WAITLIST_DROPOUT_RATE_PER_WEEK
+from model import evaluate_scenario_columns, scenario_columns
+from rendering import show_table
+from scenario_library import capture_app_state, state_to_scenarios
+
+CAPACITY_REPLICATIONS = 20
+# The scenario inputs the queue itself depends on; everything else only changes what waiting costs
+QUEUE_FIELDS = ("num_participants", "retention_rate", "sessions_per_participant", "avg_sessions_dropouts")
+
+
+# Cached on the queue inputs alone, so e.g. a decay slider change doesn't re-simulate.
+# A fixed seed keeps the figures steady between reruns.
+@st.cache_data(show_spinner="Simulating waiting lists...", max_entries=32)
+def _queue_replications(streams, working_weeks, baseline_org_yearly_clients, num_coaches, caseload_per_coach, waitlist_dropout_rate):
+    return simulate_capacity(
+        {programme: {"working_weeks": working_weeks, **dict(zip(QUEUE_FIELDS, values))} for programme, *values in streams},
+        num_coaches=num_coaches,
+        caseload_per_coach=caseload_per_coach,
+        waitlist_dropout_rate=waitlist_dropout_rate,
+        replications=CAPACITY_REPLICATIONS,
+        seed=0,
+        baseline_org_yearly_clients=baseline_org_yearly_clients
+    )
+
+def capacity_results(scenarios, num_coaches, caseload_per_coach, waitlist_dropout_rate):
+    # scenarios: programme name -> scenario sharing the coaches. Returns (programme -> capacity-adjusted results, utilisation).
+    first = next(iter(scenarios.values()))
+    streams = tuple((programme, *(scenario[field] for field in QUEUE_FIELDS)) for programme, scenario in scenarios.items())
+    replications = _queue_replications(
+        streams, first["working_weeks"], first["baseline_org_yearly_clients"], num_coaches, caseload_per_coach, waitlist_dropout_rate
+    )
+    utilisation = float(np.mean([replication["utilisation"] for replication in replications]))
+    return {programme: capacity_adjusted_metrics(scenario, replications) for programme, scenario in scenarios.items()}, utilisation
+
+def capacity_inputs(key_suffix):
+    cap_col1, cap_col2, cap_col3 = st.columns(3)
+    with cap_col1:
+        num_coaches = st.number_input("Coaches", min_value=1, value=DEFAULT_NUM_COACHES, step=1, key=f"capacity_coaches_{key_suffix}")
+    with cap_col2:
+        caseload_per_coach = st.number_input("Clients per coach each week", min_value=1, value=DEFAULT_CASELOAD_PER_COACH, step=1, key=f"capacity_caseload_{key_suffix}")
+    with cap_col3:
+        waitlist_dropout_rate = st.slider(
+            "Chance of giving up per week waiting (%)", 0.0, 50.0, DEFAULT_WAITLIST_DROPOUT_RATE_PER_WEEK * 100, 0.5, key=f"capacity_dropout_{key_suffix}"
+        ) / 100.0
+    return num_coaches, caseload_per_coach, waitlist_dropout_rate
+
+def display_capacity_comparison():
+    st.header("Waiting Lists Across Programmes")
+    st.markdown("The programme results assume everyone starts straight away. Here every programme, with the settings from its tab, shares one pool of coaching slots with the org's baseline clients: people wait for a free slot, some give up while waiting, and those who wait start benefiting later.")
+    if not st.toggle("Simulate waiting lists", key="capacity_run_all"):
+        return
+    num_coaches, caseload_per_coach, waitlist_dropout_rate = capacity_inputs("all")
+    scenarios = state_to_scenarios(capture_app_state(st.session_state))
+    adjusted, utilisation = capacity_results(scenarios, num_coaches, caseload_per_coach, waitlist_dropout_rate)
+    unconstrained = evaluate_scenario_columns(scenario_columns(list(scenarios.values())))
+
+    df = pd.DataFrame({
+        "Mean Wait (weeks)": [adjusted[programme]["Mean Wait (weeks)"] for programme in scenarios],
+        "Gave Up Waiting": [adjusted[programme]["Gave Up Waiting"] for programme in scenarios],
+        "Net Prod. Hours": unconstrained["Number of Productive Hours Bought"],
+        "Net Prod. Hours with Waiting": [adjusted[programme]["Number of Productive Hours Bought"] for programme in scenarios],
+        "Cost / Prod. Hr": unconstrained["Cost per Productive Hour Bought"],
+        "Cost / Prod. Hr with Waiting": [adjusted[programme]["Cost per Productive Hour Bought"] for programme in scenarios],
+    }, index=list(scenarios))
+    st.metric(label="Coach slots in use", value=f"{utilisation * 100:,.0f}%")
+    show_table(df, {
+        "Mean Wait (weeks)": "{:,.1f}",
+        "Gave Up Waiting": "{:,.1f}",
+        "Net Prod. Hours": "{:,.0f}",
+        "Net Prod. Hours with Waiting": "{:,.0f}",
+        "Cost / Prod. Hr": "${:,.2f}",
+        "Cost / Prod. Hr with Waiting": "${:,.2f}",
+    }, key="capacity_comparison")
@@ -20,6 +20,7 @@ def display_model_parameters_tab():
         min_value=0.0, 
         value=DEFAULT_COST_PER_SESSION, 
         step=0.50,
+        key="cost_per_session_global",
         help="The direct financial cost for one coaching session."
     )
     working_weeks_per_year = st.number_input(
@@ -28,6 +29,7 @@ def display_model_parameters_tab():
         max_value=52, 
         value=DEFAULT_WORKING_WEEKS_PER_YEAR, 
         step=1,
+        key="working_weeks_global",
         help="Assumed number of weeks a participant works in a year."
     )
     proportion_time_during_work = st.slider(
@@ -36,6 +38,7 @@ def display_model_parameters_tab():
         100.0, 
         DEFAULT_PROPORTION_TIME_DURING_WORK * 100, 
         0.1,
+        key="prop_time_work_global",
         help="What percentage of time spent on coaching sessions and related homework is assumed to occur during typical work hours?"
     ) / 100.0
     homework_hours_per_session = st.number_input(
@@ -43,6 +46,7 @@ def display_model_parameters_tab():
         min_value=0.0, 
         value=DEFAULT_HOMEWORK_HOURS_PER_SESSION, 
         step=0.1,
+        key="homework_hrs_global",
         help="Assumed hours of homework or preparation per coaching session."
     )
     avg_sessions_for_dropouts = st.number_input(
@@ -50,6 +54,7 @@ def display_model_parameters_tab():
         min_value=0.0, 
         value=DEFAULT_AVG_SESSIONS_FOR_DROPOUTS, 
         step=0.1,
+        key="avg_sessions_dropouts_global",
         help="On average, how many sessions does a participant who drops out complete? This affects their time cost."
     )
     session_duration = st.number_input(
@@ -57,6 +62,7 @@ def display_model_parameters_tab():
         min_value=0.1, 
         value=DEFAULT_SESSION_DURATION,
         step=0.1,
+        key="session_duration_global",
         help="How long is one coaching session in hours?"
     )
 
@@ -68,6 +74,7 @@ def display_model_parameters_tab():
         min_value=0.0,
         value=DEFAULT_DISAPPOINTMENT_HOURS_PER_DROPOUT,
         step=1.0,
+        key="disappointment_hours_global",
         help="Estimated productive hours lost by a participant due to dropping out and delaying alternative help."
     )
 
@@ -76,6 +83,7 @@ def display_model_parameters_tab():
         min_value=0.0, 
         value=DEFAULT_BASELINE_ORG_YEARLY_CLIENTS,
         step=10.0,
+        key="baseline_org_yearly_clients_global",
         help="Baseline number of clients the organization serves annually, EXCLUDING participants from this specific EA offering being modeled. Used to provide context for R&D budget explanations."
     )
     
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np # For np.nan
-from config import ORGANISATION_FIXED_COSTS # Import the R&D budget
+from config import ORGANISATION_FIXED_COSTS, FTE_HOURS_PER_YEAR # Import the R&D budget
+from rendering import show_table
 
 def display_overall_comparison_tab(results_data):
     st.header("Programme Comparison: Key Metrics")
@@ -24,7 +25,6 @@ def display_overall_comparison_tab(results_data):
     }
     df = df.rename(columns=column_renames)
 
-    FTE_HOURS_PER_YEAR = 2080 
     if 'Net Prod. Hours Bought' in df.columns and 'Direct Programme Cost' in df.columns:
         # Ensure 'Net Prod. Hours Bought' is not zero for division
         df['Cost per FTE'] = np.where(
@@ -88,7 +88,7 @@ def display_overall_comparison_tab(results_data):
         'Cost per FTE': '${:,.0f}'
     }
     valid_formats = {k: v for k, v in formats.items() if k in df_display.columns}
-    st.dataframe(df_display.style.format(valid_formats, na_rep="N/A"), height=(df_display.shape[0] + 1) * 35 + 3)
+    show_table(df_display, valid_formats, "overall_comparison", height=(df_display.shape[0] + 1) * 35 + 3)
     
     st.markdown('---') # Separator
     st.subheader("Understanding the Costs")
@@ -150,7 +150,7 @@ Our fixed costs are roughly **${ORGANISATION_FIXED_COSTS:,.0f}**. We'd also ask
                 np.nan
             )
         # Show updated table
-        st.dataframe(df_with_rd.style.format(valid_formats, na_rep="N/A"), height=(df_with_rd.shape[0] + 1) * 35 + 3)
+        show_table(df_with_rd, valid_formats, "overall_comparison_fixed_costs", height=(df_with_rd.shape[0] + 1) * 35 + 3)
 
     # New section: What do I get for the extra money spent on covering fixed costs?
     st.markdown("## What do I get for the extra money spent on covering fixed costs?")
@@ -1,13 +1,21 @@
 import streamlit as st
 import numpy as np
-# pandas and altair are not directly used by display_programme_tab itself,
-# but by display_decay_visualisation which it calls from utils.py.
-# So, they are not strictly needed here if display_decay_visualisation handles its own chart objects.
+import pandas as pd
+import altair as alt
 
 # Import helper functions from utils.py
-from utils import display_decay_visualisation, calculate_total_gain_per_ea
+from utils import display_decay_visualisation, decay_lookup_table
+# The streamlit-free model core does the actual programme calculation
+from model import default_scenario
+# The model graph only recomputes the stages downstream of inputs that changed since the last rerun
+from model_graph import ProgrammeModelGraph
+from break_even import solve_break_even
+from sensitivity import sensitivity_table
+from scale_costs import DEFAULT_SCALE_GRID, scale_frontier
+from tabs.capacity_tab import capacity_inputs, capacity_results
+from rendering import lean_rendering, thin_line_data
 # No direct config import needed here as `offerings` (tab_defaults) is passed in.
-from config import DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS
+from config import DEFAULT_COACH_HIRING_AMORTISATION_YEARS
 from config import programme_introductions, programme_productivity_gain_explanations
 
 def display_programme_tab(
@@ -24,6 +32,7 @@ def display_programme_tab(
     baseline_org_yearly_clients_config # Retained for context if needed, but not used for cost calculation here
 ):
     st.header(f"{tab_name} Programme")
+    scenario_defaults = default_scenario(tab_name)
     # Use config-based introduction text
     intro_text = programme_introductions.get(tab_name, "")
     if intro_text:
@@ -57,6 +66,9 @@ def display_programme_tab(
         We suspect that it will decay sharply without additional intervention, which is why we provide a free GoalsWon referral to help prevent relapse.
         """)
     
+    # Precomputed decay chart series for every slider position (None if turned off), shared across sessions
+    decay_table = decay_lookup_table()
+
     decay_model = st.selectbox(
         "Benefit Decay Model", 
         options=decay_model_options, 
@@ -65,9 +77,6 @@ def display_programme_tab(
         help="'Exponential Decay': Benefits reduce by a fixed percentage each period. 'Linear Decay': Benefits reduce by a fixed amount each period until zero. 'Custom Curve': Define your own decay curve by adjusting control points.'"
     )
 
-    timeframe_of_interest_months = DEFAULT_TIMEFRAME_OF_INTEREST_MONTHS
-    timeframe_of_interest_weeks = (timeframe_of_interest_months / 12) * working_weeks_global
-
     annual_decay_rate_input = None
     months_to_zero_input = None
     custom_month_sliders = {}
@@ -98,7 +107,7 @@ def display_programme_tab(
             custom_month_sliders['month_6'] = st.slider('Benefit at 6 months (%)', 0.0, 100.0, 50.0, 1.0, key=f"custom_6month_{tab_name}") / 100.0
             custom_month_sliders['month_12'] = st.slider('Benefit at 12 months (%)', 0.0, 100.0, 15.0, 1.0, key=f"custom_12month_{tab_name}") / 100.0
     
-    weekly_points_for_calc = display_decay_visualisation(
+    display_decay_visualisation(
         decay_model,
         annual_decay_rate_input=annual_decay_rate_input,
         months_to_zero_input=months_to_zero_input,
@@ -106,7 +115,7 @@ def display_programme_tab(
         month_6_slider=custom_month_sliders.get('month_6'),
         month_9_slider=custom_month_sliders.get('month_9'),
         month_12_slider=custom_month_sliders.get('month_12'),
-        timeframe_of_interest_weeks_calc=timeframe_of_interest_weeks
+        decay_table=decay_table
     )
 
     st.subheader("Intervention Impact & Participants")
@@ -114,11 +123,11 @@ def display_programme_tab(
     st.markdown("We assume that anyone who who dropped out without telling us they were better got zero benefit. So, we only need to consider people who've completed the programme.")
     pre_hours = st.slider(
         'How many hours do you think our median completer would spend on EA activities before the intervention?',
-        min_value=0, max_value=80, value=30 if tab_name == "Procrastination" else tab_defaults["pre_intervention_hours"], step=1, key=f"pre_hours_{tab_name}"
+        min_value=0, max_value=80, value=scenario_defaults["pre_hours"], step=1, key=f"pre_hours_{tab_name}"
     )
     post_hours = st.slider(
         'When the treatment has hit maximal effectiveness, but before the effect starts to decay, how many hours do you expect them to work?',
-        min_value=0, max_value=80, value=39 if tab_name == "Procrastination" else tab_defaults["post_intervention_hours"], step=1, key=f"post_hours_{tab_name}"
+        min_value=0, max_value=80, value=scenario_defaults["post_hours"], step=1, key=f"post_hours_{tab_name}"
     )
     if tab_name == "Bespoke Offering":
         pass
@@ -128,7 +137,7 @@ def display_programme_tab(
     # Productivity multiplier slider: always use config value
     productivity_multiplier = st.slider(
         'After the treatment has hit maximal effectiveness, but before the effect starts to decay, how much more productive is each working hour?' + ' (e.g. 1.10 = 10% more productive)',
-        min_value=0.0, max_value=2.0, value=1.01 if tab_name == "Procrastination" else tab_defaults["productivity_multiplier"], step=0.01, key=f"productivity_multiplier_{tab_name}"
+        min_value=0.0, max_value=2.0, value=scenario_defaults["productivity_multiplier"], step=0.01, key=f"productivity_multiplier_{tab_name}"
     )
     
     implied_productivity_gain = ((post_hours * productivity_multiplier) - pre_hours) / pre_hours * 100 if pre_hours > 0 else 0
@@ -154,68 +163,41 @@ def display_programme_tab(
         'Participants', min_value=10, max_value=1000, value=tab_defaults["num_participants"], step=1, key=f"num_participants_{tab_name}"
     )
     sessions_per_participant = tab_defaults["sessions_per_participant"]
-    
-    total_EAs = num_participants
-    overall_retention_rate = retention_rate
-    total_retained_EAs = total_EAs * overall_retention_rate
-    
-    initial_weekly_gain_per_ea_abs = ( (post_hours * productivity_multiplier) - pre_hours )
-    if pre_hours == 0: 
-        initial_weekly_gain_per_ea_abs = (post_hours * productivity_multiplier)
-
-    # This calculates GROSS hours gained per EA over the period, before accounting for time spent on intervention
-    gross_gain_over_period_per_ea_who_completes = calculate_total_gain_per_ea(
-        initial_weekly_gain_per_ea_abs=initial_weekly_gain_per_ea_abs,
-        decay_model=decay_model,
-        timeframe_of_interest_weeks=timeframe_of_interest_weeks,
-        working_weeks_per_year=working_weeks_global,
-        annual_decay_rate=annual_decay_rate_input,
-        months_to_zero=months_to_zero_input,
-        custom_weekly_points=weekly_points_for_calc
-    )
 
-    # Total gross hours from all EAs who are retained
-    gross_productive_hours_gain_from_retained = gross_gain_over_period_per_ea_who_completes * total_retained_EAs
-    
-    time_spent_retained_during_work = (
-        total_retained_EAs *
-        sessions_per_participant *
-        (session_duration_global + homework_hrs_global) *
-        prop_time_work_global
-    )
-    time_spent_dropouts_during_work = (
-        (total_EAs - total_retained_EAs) *
-        avg_sessions_dropouts_global *
-        (session_duration_global + homework_hrs_global) *
-        prop_time_work_global
-    )
+    scenario = default_scenario(tab_name, {
+        "decay_model": decay_model,
+        "annual_decay_rate": annual_decay_rate_input,
+        "months_to_zero": months_to_zero_input,
+        "pre_hours": pre_hours,
+        "post_hours": post_hours,
+        "productivity_multiplier": productivity_multiplier,
+        "retention_rate": retention_rate,
+        "num_participants": num_participants,
+        "sessions_per_participant": sessions_per_participant,
+        "cost_per_session": cost_per_session_global,
+        "working_weeks": working_weeks_global,
+        "prop_time_work": prop_time_work_global,
+        "homework_hrs": homework_hrs_global,
+        "avg_sessions_dropouts": avg_sessions_dropouts_global,
+        "session_duration": session_duration_global,
+        "disappointment_hours": disappointment_hours_config,
+        "baseline_org_yearly_clients": baseline_org_yearly_clients_config,
+    })
+    if decay_model == "Custom Curve":
+        scenario.update({f"custom_{key}": value for key, value in custom_month_sliders.items()})
 
-    SIGN_UP_HOURS_PER_PARTICIPANT = 0.5 # Assuming this is a constant
-    time_spent_on_sign_up_during_work = (
-        total_EAs * 
-        SIGN_UP_HOURS_PER_PARTICIPANT * 
-        prop_time_work_global
-    )
-
-    num_dropouts = total_EAs - total_retained_EAs
-    total_dropout_productivity_loss = num_dropouts * disappointment_hours_config
+    graph_key = f"model_graph_{tab_name}"
+    if graph_key not in st.session_state:
+        st.session_state[graph_key] = ProgrammeModelGraph(scenario)
+    model_graph = st.session_state[graph_key]
+    model_graph.update(scenario)
+    results = model_graph.results()
 
-    number_of_productive_hours_bought = (
-        gross_productive_hours_gain_from_retained - 
-        time_spent_retained_during_work - 
-        time_spent_dropouts_during_work - 
-        time_spent_on_sign_up_during_work - 
-        total_dropout_productivity_loss
-    )
-    
-    # Calculate base cost from sessions (This is now the total direct cost for this programme)
-    base_sessions_cost = sessions_per_participant * cost_per_session_global * total_EAs
-    total_cost = base_sessions_cost # Total cost is now only the direct sessions cost
-
-    cost_per_productive_hour_bought = total_cost / number_of_productive_hours_bought if number_of_productive_hours_bought != 0 else np.nan
-
-    # Calculate metrics for display
-    net_hours_gained_per_retained_client = (number_of_productive_hours_bought / total_retained_EAs) if total_retained_EAs > 0 else 0
+    total_cost = results["Total Cost (Money Spent)"]
+    number_of_productive_hours_bought = results["Number of Productive Hours Bought"]
+    cost_per_productive_hour_bought = results["Cost per Productive Hour Bought"]
+    total_retained_EAs = results["Clients Retained"]
+    net_hours_gained_per_retained_client = results["Net Hours Gained per Retained Client"]
     cost_per_retained_client = (total_cost / total_retained_EAs) if total_retained_EAs > 0 else np.nan
 
     st.subheader("Programme Outcomes")
@@ -255,12 +237,134 @@ def display_programme_tab(
             value=f"{net_hours_gained_per_retained_client:,.1f}"
         )
 
-    return {
-        "Total Cost (Money Spent)": total_cost, # This is the direct cost
-        "Number of Productive Hours Bought": number_of_productive_hours_bought,
-        "Cost per Productive Hour Bought": cost_per_productive_hour_bought,
-        "Total Clients Seen": total_EAs,
-        "Clients Retained": total_retained_EAs,
-        "Net Hours Gained per Retained Client": net_hours_gained_per_retained_client,
-        "Baseline Org Yearly Clients Config": baseline_org_yearly_clients_config # Pass this through for Overall tab context
-    } 
\ No newline at end of file
+    with st.expander("Break-even finder"):
+        st.markdown("What value of one input would make this programme hit a target cost? Everything else stays as set above.")
+        if st.toggle("Find the break-even value", key=f"break_even_run_{tab_name}"):
+            break_even_inputs = {
+                "post_hours": "Post-intervention hours",
+                "productivity_multiplier": "Productivity multiplier",
+                "retention_rate": "Retention rate (%)",
+                "cost_per_session": "Cost per session ($)",
+            }
+            if decay_model == "Exponential Decay":
+                break_even_inputs = {"annual_decay_rate": "Annual decay rate (%)", **break_even_inputs}
+            elif decay_model == "Linear Decay":
+                break_even_inputs = {"months_to_zero": "Months until effect is zero", **break_even_inputs}
+            be_col1, be_col2, be_col3 = st.columns(3)
+            with be_col1:
+                break_even_input = st.selectbox(
+                    "Input to solve for", options=list(break_even_inputs), format_func=break_even_inputs.get, key=f"break_even_input_{tab_name}"
+                )
+            with be_col2:
+                break_even_metric = st.selectbox(
+                    "Target metric", options=["Cost per Productive Hour Bought", "Cost per FTE"],
+                    format_func={"Cost per Productive Hour Bought": "Cost / Prod. Hour", "Cost per FTE": "Cost per FTE"}.get,
+                    key=f"break_even_metric_{tab_name}"
+                )
+            with be_col3:
+                break_even_target = st.number_input(
+                    "Target ($)", min_value=0.01, value=1.0 if break_even_metric == "Cost per Productive Hour Bought" else 2080.0,
+                    step=0.1 if break_even_metric == "Cost per Productive Hour Bought" else 100.0, key=f"break_even_target_{tab_name}"
+                )
+            break_even_value = solve_break_even([scenario], break_even_input, break_even_target, target_metric=break_even_metric)[0]
+            if np.isnan(break_even_value):
+                st.info("No value of this input within its slider range reaches that target.")
+            elif break_even_input in ("annual_decay_rate", "retention_rate"):
+                st.metric(label=f"Break-even {break_even_inputs[break_even_input]}", value=f"{break_even_value * 100:,.1f}%")
+            elif break_even_input == "cost_per_session":
+                st.metric(label=f"Break-even {break_even_inputs[break_even_input]}", value=f"${break_even_value:,.2f}")
+            elif break_even_input == "months_to_zero":
+                st.metric(label=f"Break-even {break_even_inputs[break_even_input]}", value=f"{break_even_value:,.1f}")
+            else:
+                st.metric(label=f"Break-even {break_even_inputs[break_even_input]}", value=f"{break_even_value:,.2f}")
+
+    with st.expander("Sensitivity"):
+        st.markdown("How much each outcome moves for a one-step change in each input, holding everything else as set above. Elasticity is the % change in Cost / Prod. Hour for a 1% change in the input.")
+        if st.toggle("Show sensitivities", key=f"sensitivity_run_{tab_name}"):
+            sensitivity_df = sensitivity_table(scenario)
+            st.dataframe(sensitivity_df.style.set_uuid(f"sensitivity_{tab_name}").format({
+                "Net Prod. Hours Bought": "{:+,.1f}",
+                "Cost / Prod. Hr": "{:+,.4f}",
+                "Elasticity of Cost / Prod. Hr": "{:+,.2f}",
+            }, na_rep="N/A"), height=(sensitivity_df.shape[0] + 1) * 35 + 3)
+
+    with st.expander("Waiting for a coach"):
+        st.markdown("The results above assume everyone starts straight away. Here this programme's participants and the org's baseline clients share a fixed number of coaching slots through the year: people wait for a free slot, some give up while waiting, and those who wait start benefiting later, so less of the benefit falls inside the timeframe. The Overall tab runs every programme together.")
+        # Expander bodies run even when collapsed, so the simulation waits until it's asked for
+        if st.toggle("Simulate waiting lists", key=f"capacity_run_{tab_name}"):
+            num_coaches, caseload_per_coach, waitlist_dropout_rate = capacity_inputs(tab_name)
+            adjusted, utilisation = capacity_results({tab_name: scenario}, num_coaches, caseload_per_coach, waitlist_dropout_rate)
+            capacity_metrics = adjusted[tab_name]
+            capacity_cost_per_hour = capacity_metrics["Cost per Productive Hour Bought"]
+
+            wait_col1, wait_col2, wait_col3 = st.columns(3)
+            with wait_col1:
+                st.metric(label="Mean wait for a slot", value=f"{capacity_metrics['Mean Wait (weeks)']:,.1f} weeks")
+                st.metric(label="Coach slots in use", value=f"{utilisation * 100:,.0f}%")
+            with wait_col2:
+                st.metric(label="Gave up waiting", value=f"{capacity_metrics['Gave Up Waiting']:,.1f}")
+                st.metric(label="Clients retained", value=f"{capacity_metrics['Clients Retained']:,.1f}")
+            with wait_col3:
+                st.metric(
+                    label="Net Prod. Hours with waiting",
+                    value=f"{capacity_metrics['Number of Productive Hours Bought']:,.0f}",
+                    delta=f"{capacity_metrics['Number of Productive Hours Bought'] - number_of_productive_hours_bought:,.0f}"
+                )
+                st.metric(
+                    label="Cost / Prod. Hr with waiting",
+                    value=f"${capacity_cost_per_hour:,.2f}" if not np.isnan(capacity_cost_per_hour) else "N/A",
+                    delta=f"${capacity_cost_per_hour - cost_per_productive_hour_bought:,.2f}" if not np.isnan(capacity_cost_per_hour - cost_per_productive_hour_bought) else None,
+                    delta_color="inverse"
+                )
+
+    with st.expander("Cost at scale"):
+        st.markdown(f"How yearly cost and hours change if this programme grew from tens to tens of thousands of participants, once the team runs out of coaching slots: new coaches are hired (hiring spread over {DEFAULT_COACH_HIRING_AMORTISATION_YEARS:g} years, and paid for a full caseload), every few coaches need a supervisor, and each extra participant costs more to recruit.")
+        if st.toggle("Cost the programme at scale", key=f"scale_run_{tab_name}"):
+            include_fixed_share = st.checkbox(
+                "Include a share of our fixed costs (falls per participant as the programme grows)", key=f"scale_fixed_share_{tab_name}"
+            )
+            frontier = scale_frontier(
+                [scenario],
+                participants=np.union1d(DEFAULT_SCALE_GRID, [num_participants]),
+                parameters={tab_name: {"include_fixed_cost_share": include_fixed_share}}
+            )
+            current = frontier[frontier["Participants"] == num_participants].iloc[0]
+            best = frontier.loc[frontier["Cost / Prod. Hr"].idxmin()] if frontier["Cost / Prod. Hr"].notna().any() else None
+
+            # Only the plotted columns go to the browser; low-bandwidth mode also drops points that don't show on screen
+            frontier_plot = frontier[["Participants", "Total Cost", "Net Prod. Hours", "Cost / Prod. Hr"]]
+            if lean_rendering():
+                frontier_plot = thin_line_data(frontier_plot, "Net Prod. Hours", "Total Cost")
+            frontier_chart = alt.Chart(frontier_plot).mark_line().encode(
+                x=alt.X("Net Prod. Hours:Q", title="Net Prod. Hours Bought"),
+                y=alt.Y("Total Cost:Q", title="Total Cost ($)"),
+                tooltip=["Participants", alt.Tooltip("Total Cost:Q", format="$,.0f"), alt.Tooltip("Net Prod. Hours:Q", format=",.0f"), alt.Tooltip("Cost / Prod. Hr:Q", format="$,.2f")]
+            )
+            current_point = alt.Chart(pd.DataFrame([current[["Participants", "Total Cost", "Net Prod. Hours"]]])).mark_circle(size=100, color="red").encode(
+                x="Net Prod. Hours:Q", y="Total Cost:Q", tooltip=["Participants"]
+            )
+            st.altair_chart((frontier_chart + current_point).properties(title="Total cost vs hours bought as scale grows (red: current)", height=300), use_container_width=True)
+
+            per_hour = frontier.melt(
+                id_vars="Participants", value_vars=["Cost / Prod. Hr", "Marginal Cost / Prod. Hr"], var_name="Measure", value_name="Cost per Hour"
+            ).dropna()
+            if lean_rendering():
+                per_hour = thin_line_data(per_hour, "Participants", "Cost per Hour", by="Measure", log_x=True)
+            per_hour_chart = alt.Chart(per_hour).mark_line().encode(
+                x=alt.X("Participants:Q", scale=alt.Scale(type="log")),
+                y=alt.Y("Cost per Hour:Q", title="$ per Prod. Hour"),
+                color=alt.Color("Measure:N", legend=alt.Legend(orient="bottom")),
+                tooltip=["Participants", "Measure", alt.Tooltip("Cost per Hour:Q", format="$,.3f")]
+            ).properties(title="Average and marginal cost per productive hour", height=300)
+            st.altair_chart(per_hour_chart, use_container_width=True)
+
+            scale_col1, scale_col2, scale_col3 = st.columns(3)
+            with scale_col1:
+                st.metric(label="Cost / Prod. Hr at current scale", value=f"${current['Cost / Prod. Hr']:,.2f}" if not np.isnan(current["Cost / Prod. Hr"]) else "N/A")
+            with scale_col2:
+                st.metric(label="Marginal cost of one more participant", value=f"${current['Marginal Cost / Participant']:,.0f}")
+            with scale_col3:
+                if best is not None:
+                    st.metric(label="Cheapest scale per hour", value=f"{best['Participants']:,.0f} participants", delta=f"${best['Cost / Prod. Hr']:,.2f} / hr", delta_color="off")
+
+    return results
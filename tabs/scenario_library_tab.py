@@ -0,0 +1,92 @@
+import streamlit as st
+
+from scenario_library import (
+    capture_app_state,
+    restore_app_state,
+    encode_state,
+    decode_state,
+    load_library,
+    save_to_library,
+    delete_from_library,
+    compare_scenarios,
+)
+
+CURRENT_SCENARIO_NAME = "Current settings"
+CURRENT_SCENARIO = None # The compare option for the live settings, so no saved name can stand in for it
+
+
+def _load_code(code):
+    # Runs as a button callback, i.e. before the widgets are drawn on the next rerun
+    try:
+        restore_app_state(st.session_state, decode_state(code))
+    except ValueError as e:
+        st.session_state["scenario_library_error"] = str(e)
+
+def display_scenario_library():
+    st.header("Saved Scenarios")
+    st.markdown("Save the settings from every tab, reload them later or share them as a code, and compare any saved scenarios side by side.")
+    st.caption("Saved scenarios are kept in one file on the server, so everyone using this app sees, loads and can delete the same list. Share codes are the way to keep a scenario to yourself.")
+
+    if "scenario_library_error" in st.session_state:
+        st.error(st.session_state.pop("scenario_library_error"))
+
+    current_state = capture_app_state(st.session_state)
+    current_code = encode_state(current_state)
+    st.markdown("**Share code for the current settings** (or add `?scenario=<code>` to the app's address):")
+    st.code(current_code, language=None)
+
+    save_col, import_col = st.columns(2)
+    with save_col:
+        save_name = st.text_input("Save current settings as", key="scenario_library_save_name")
+        if st.button("Save", key="scenario_library_save"):
+            try:
+                if save_name.strip() == CURRENT_SCENARIO_NAME:
+                    raise ValueError(f"'{CURRENT_SCENARIO_NAME}' is reserved for the live settings; pick another name.")
+                save_to_library(save_name, current_code)
+                st.success(f"Saved '{save_name.strip()}'.")
+            except ValueError as e:
+                st.error(str(e))
+    with import_col:
+        import_code = st.text_input("Load settings from a share code", key="scenario_library_import_code")
+        st.button("Load code", key="scenario_library_import", on_click=_load_code, args=(import_code,), disabled=not import_code)
+
+    try:
+        library = load_library()
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if not library:
+        st.info("No saved scenarios yet.")
+        return
+
+    load_col, delete_col = st.columns(2)
+    with load_col:
+        selected = st.selectbox("Saved scenario", options=sorted(library), key="scenario_library_selected")
+        st.button("Load into the app", key="scenario_library_load", on_click=_load_code, args=(library[selected],))
+    with delete_col:
+        st.markdown("&nbsp;")
+        if st.button("Delete", key="scenario_library_delete"):
+            delete_from_library(selected)
+            st.rerun()
+
+    st.subheader("Compare Scenarios")
+    # Saved under the reserved name before it was reserved: still comparable, under a distinct label
+    labels = {name: f"{name} (saved)" if name == CURRENT_SCENARIO_NAME else name for name in library}
+    labels[CURRENT_SCENARIO] = CURRENT_SCENARIO_NAME
+    compared = st.multiselect(
+        "Scenarios to compare", options=[CURRENT_SCENARIO] + sorted(library),
+        default=[CURRENT_SCENARIO], format_func=labels.get, key="scenario_library_compared"
+    )
+    if len(compared) < 2:
+        st.info("Pick at least two scenarios. Differences are shown against the first one picked.")
+        return
+    try:
+        states = {
+            labels[name]: current_state if name is CURRENT_SCENARIO else decode_state(library[name])
+            for name in compared
+        }
+    except ValueError as e:
+        st.error(f"Can't compare these scenarios: {e}")
+        return
+    comparison = compare_scenarios(states)
+    st.dataframe(comparison.style.set_uuid("scenario_comparison").format("{:,.2f}", na_rep="N/A"), height=(comparison.shape[0] + 1) * 35 + 3)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import api
+from config import offerings
+
+
+async def _request(port, method, path, body=None):
+    # One request with Connection: close, read until the server closes the socket
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=60)
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+async def _with_server(service, requests):
+    server = await asyncio.start_server(lambda r, w: api._handle_connection(service, r, w), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return [await _request(port, *request) for request in requests]
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.shutdown()
+
+
+def test_pooled_batch_closes_connection():
+    # Big enough to go to the worker pool; workers mustn't keep the client socket open
+    programme = next(iter(offerings))
+    scenarios = [{"programme": programme, "num_participants": 10 + i} for i in range(100)]
+    service = api.ModelService(max_workers=2)
+    [(status, payload)] = asyncio.run(_with_server(service, [("POST", "/batch", {"scenarios": scenarios})]))
+    assert status == 200
+    assert len(payload["results"]) == 100
+
+def test_unexpected_error_returns_500(monkeypatch):
+    def broken(scenario):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(api, "_evaluate_scenario", broken)
+    programme = next(iter(offerings))
+    [(status, payload)] = asyncio.run(_with_server(api.ModelService(), [("POST", "/scenario", {"programme": programme})]))
+    assert status == 500
+    assert "boom" in payload["error"]
+
+def test_non_finite_values_become_null():
+    body = api._response(api.HTTPStatus.OK, {"a": float("inf"), "b": [float("nan"), 1.5], "c": {"d": float("-inf")}}, False)
+    payload = json.loads(body.partition(b"\r\n\r\n")[2])
+    assert payload == {"a": None, "b": [None, 1.5], "c": {"d": None}}
+
+def test_invalid_scenarios_return_400():
+    programme = next(iter(offerings))
+    requests = [
+        ("POST", "/scenario", {"programme": ["not", "a", "name"]}),
+        ("POST", "/scenario", {"programme": programme, "working_weeks": 1e9}),
+        ("POST", "/scenario", {"programme": programme, "pre_hours": "lots"}),
+        ("POST", "/batch", {"scenarios": [{"programme": programme}, {"programme": programme, "retention_rate": 1.5}]}),
+    ]
+    responses = asyncio.run(_with_server(api.ModelService(), requests))
+    assert [status for status, _ in responses] == [400] * len(requests)
+    assert "working_weeks" in responses[1][1]["error"]
+
+def test_bad_content_length_returns_400():
+    async def send():
+        server = await asyncio.start_server(lambda r, w: api._handle_connection(api.ModelService(), r, w), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /scenario HTTP/1.1\r\nHost: localhost\r\nContent-Length: ten\r\n\r\n")
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=60)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+    assert asyncio.run(send()).split()[1] == b"400"
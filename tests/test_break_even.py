@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import break_even
+from break_even import CLOSED_FORM_INPUTS, SOLVABLE_INPUTS, solve_break_even
+from model import evaluate_scenario_columns, scenario_columns
+from tests.test_model import _random_scenarios
+
+
+def _scenarios_and_targets(n=40):
+    scenarios = _random_scenarios(n, seed=3)
+    results = evaluate_scenario_columns(scenario_columns(scenarios))
+    # Targets near each scenario's own cost per hour, so most are reachable by a modest change
+    targets = np.abs(results["Cost per Productive Hour Bought"]) * np.linspace(0.6, 1.6, n)
+    return scenarios, targets
+
+
+@pytest.mark.parametrize("variable", CLOSED_FORM_INPUTS)
+def test_closed_form_matches_root_finder(variable, monkeypatch):
+    scenarios, targets = _scenarios_and_targets()
+    lower, upper = SOLVABLE_INPUTS[variable]
+    bounds = (lower, min(upper, 1000.0)) # The root-finder needs a finite bracket
+    closed = solve_break_even(scenarios, variable, targets, bounds=bounds)
+    monkeypatch.setattr(break_even, "CLOSED_FORM_INPUTS", ())
+    numeric = solve_break_even(scenarios, variable, targets, bounds=bounds)
+
+    assert np.isfinite(closed).sum() >= 3
+    np.testing.assert_array_equal(np.isnan(closed), np.isnan(numeric))
+    np.testing.assert_allclose(closed, numeric, rtol=1e-6, atol=1e-8, equal_nan=True)
+
+
+def test_closed_form_hits_the_target():
+    scenarios, targets = _scenarios_and_targets()
+    columns = scenario_columns(scenarios)
+    for variable in ("prop_time_work", "homework_hrs", "avg_sessions_dropouts", "session_duration"):
+        solution = solve_break_even(scenarios, variable, targets)
+        solved = np.isfinite(solution)
+        trial = dict(columns)
+        trial[variable] = np.where(solved, solution, columns[variable])
+        cost_per_hour = evaluate_scenario_columns(trial)["Cost per Productive Hour Bought"]
+        np.testing.assert_allclose(cost_per_hour[solved], targets[solved], rtol=1e-9)
+
+
+@pytest.mark.parametrize("variable, step", [("months_to_zero", 0.1), ("working_weeks", 1.0)])
+def test_stepped_inputs_snap_to_a_step_that_meets_the_target(variable, step, monkeypatch):
+    scenarios, targets = _scenarios_and_targets()
+    columns = scenario_columns(scenarios)
+    snapped = solve_break_even(scenarios, variable, targets)
+    monkeypatch.setattr(break_even, "INPUT_STEPS", {})
+    crossing = solve_break_even(scenarios, variable, targets)
+
+    # Snapping can also rescue a crossing that sits on a jump where hours are still negative
+    assert np.all(np.isfinite(snapped[np.isfinite(crossing)]))
+    solved = np.isfinite(snapped)
+    assert solved.sum() >= 3
+    lower = SOLVABLE_INPUTS[variable][0]
+    np.testing.assert_allclose((snapped[solved] - lower) / step, np.round((snapped[solved] - lower) / step), atol=1e-9)
+    both = solved & np.isfinite(crossing)
+    assert np.all(np.abs(snapped[both] - crossing[both]) <= step + 1e-9)
+    trial = dict(columns)
+    trial[variable] = np.where(solved, snapped, columns[variable])
+    cost_per_hour = evaluate_scenario_columns(trial)["Cost per Productive Hour Bought"]
+    assert np.all(cost_per_hour[solved] <= targets[solved] * (1 + 1e-12))
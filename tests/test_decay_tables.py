@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from decay_tables import DECAY_RATE_TENTHS, MONTHS_TO_ZERO_TENTHS, DecayLookupTable, _annual_decay_rate, _months_to_zero, load_or_build_decay_table
+from model import exponential_decay_series, linear_decay_series
+
+
+@pytest.fixture(scope="module")
+def table():
+    return DecayLookupTable.build()
+
+
+def test_every_chart_series_matches_the_model_exactly(table):
+    for tenths in DECAY_RATE_TENTHS:
+        rate = _annual_decay_rate(int(tenths))
+        months, values = table.exponential_series(rate)
+        expected_months, expected_values = exponential_decay_series(rate)
+        np.testing.assert_array_equal(months, expected_months)
+        np.testing.assert_array_equal(values, expected_values)
+    for tenths in MONTHS_TO_ZERO_TENTHS:
+        months_to_zero = _months_to_zero(int(tenths))
+        months, values = table.linear_series(months_to_zero)
+        expected_months, expected_values = linear_decay_series(months_to_zero)
+        np.testing.assert_array_equal(months, expected_months)
+        np.testing.assert_array_equal(values, expected_values)
+
+
+def test_values_off_the_grid_are_not_looked_up(table):
+    assert table.exponential_series(0.12345) is None
+    assert table.exponential_series(np.float64(0.25)) is None # numpy scalars aren't looked up
+    assert table.linear_series(12.05) is None
+
+
+def test_saved_table_loads_and_verifies(table, tmp_path):
+    path = tmp_path / "decay_tables.npz"
+    table.save(path)
+    loaded = DecayLookupTable.load(path, verify_samples=256)
+    np.testing.assert_array_equal(loaded.exponential_series(0.3)[1], exponential_decay_series(0.3)[1])
+
+
+def test_tampered_table_is_rejected(table, tmp_path):
+    arrays = dict(table.arrays)
+    arrays["linear_series"] = arrays["linear_series"] * (1 + 1e-12)
+    path = tmp_path / "decay_tables.npz"
+    DecayLookupTable(arrays).save(path)
+    with pytest.raises(ValueError, match="rebuild"):
+        DecayLookupTable.load(path)
+
+
+def test_unusable_table_file_is_left_alone(tmp_path):
+    path = tmp_path / "decay_tables.npz"
+    path.write_bytes(b"not a table")
+    with pytest.warns(UserWarning, match="decay charts will be computed"):
+        assert load_or_build_decay_table(str(path)) is None
+    assert path.read_bytes() == b"not a table"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from config import offerings
+from model import (
+    DECAY_MODELS,
+    calculate_programme_metrics,
+    default_scenario,
+    evaluate_scenario_columns,
+    scenario_columns,
+)
+
+# Overall tab figures from the app before the model was moved out of the tabs (default settings)
+BASELINE = {
+    ("Bespoke Offering", "Exponential Decay"): (12000.0, 54325.85301259101),
+    ("Procrastination", "Exponential Decay"): (6000.0, 41186.10055427149),
+    ("Insomnia", "Exponential Decay"): (3000.0, 23718.446589146657),
+    ("Insomnia", "Linear Decay"): (3000.0, 17787.300000000007),
+    ("Insomnia", "Custom Curve"): (3000.0, 18852.828366894068),
+}
+
+
+def _random_scenarios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    scenarios = []
+    for i in range(n):
+        scenario = default_scenario(list(offerings)[i % len(offerings)], {
+            "decay_model": DECAY_MODELS[i % len(DECAY_MODELS)],
+            "annual_decay_rate": float(rng.uniform(0.01, 0.99)),
+            "months_to_zero": float(rng.uniform(1, 60)),
+            "custom_month_3": float(rng.uniform(0.6, 1.0)),
+            "custom_month_6": float(rng.uniform(0.4, 0.6)),
+            "custom_month_9": float(rng.uniform(0.2, 0.4)),
+            "custom_month_12": float(rng.uniform(0.0, 0.2)),
+            "retention_rate": float(rng.uniform(0.1, 1.0)),
+            "num_participants": int(rng.integers(1, 2000)),
+            "working_weeks": int(rng.integers(30, 53)),
+            "post_hours": float(rng.uniform(30, 50)),
+        })
+        scenarios.append(scenario)
+    return scenarios
+
+
+@pytest.mark.parametrize("programme, decay_model", list(BASELINE))
+def test_matches_baseline_app(programme, decay_model):
+    cost, hours = BASELINE[(programme, decay_model)]
+    results = calculate_programme_metrics(default_scenario(programme, {"decay_model": decay_model}))
+    assert results["Total Cost (Money Spent)"] == cost
+    assert results["Number of Productive Hours Bought"] == pytest.approx(hours, rel=1e-12)
+
+def test_vectorised_matches_scalar():
+    scenarios = _random_scenarios(300)
+    columns = evaluate_scenario_columns(scenario_columns(scenarios))
+    for i, scenario in enumerate(scenarios):
+        expected = calculate_programme_metrics(scenario)
+        for metric, values in columns.items():
+            if metric not in expected:
+                continue
+            assert values[i] == pytest.approx(expected[metric], rel=1e-9, abs=1e-9, nan_ok=True), (metric, scenario)
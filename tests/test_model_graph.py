@@ -0,0 +1,50 @@
+import numpy as np
+
+from model import default_scenario, evaluate_scenario_columns, scenario_columns
+from model_graph import ColumnModelGraph, ProgrammeModelGraph
+from sampling import default_uncertainty, sample_scenarios
+from tests.test_model import _random_scenarios
+
+
+def _assert_same_results(actual, expected):
+    assert actual.keys() == expected.keys()
+    for metric in expected:
+        np.testing.assert_allclose(actual[metric], expected[metric], rtol=1e-12, equal_nan=True)
+
+
+def test_what_if_reuses_upstream_stages():
+    scenario = default_scenario("Insomnia", {"decay_model": "Custom Curve"})
+    graph = ColumnModelGraph(scenario_columns([scenario]))
+    graph.results()
+    distributions = default_uncertainty(scenario)
+    assert "annual_decay_rate" not in distributions
+    columns = sample_scenarios(scenario, distributions, 256, seed=1)
+    draws = {field: columns[field] for field in distributions}
+
+    _assert_same_results(graph.results_with(draws), evaluate_scenario_columns(columns))
+    counts = graph.recompute_counts
+    assert counts["decay_integral"] == 1
+    assert counts["total_cost"] == 1
+    assert counts["initial_weekly_gain"] == 2
+    assert counts["time_costs"] == 2
+    # The what-if leaves the cached base results alone
+    _assert_same_results(graph.results(), evaluate_scenario_columns(scenario_columns([scenario])))
+
+
+def test_array_inputs_only_invalidate_on_change():
+    columns = scenario_columns(_random_scenarios(10))
+    graph = ColumnModelGraph(columns)
+    graph.results()
+    assert graph.update({"pre_hours": columns["pre_hours"].copy(), "decay_model": columns["decay_model"].copy()}) == []
+    assert graph.update({"pre_hours": columns["pre_hours"] + 1}) == ["pre_hours"]
+    graph.results()
+    assert graph.recompute_counts["decay_integral"] == 1
+
+
+def test_scalar_graph_still_skips_unaffected_stages():
+    graph = ProgrammeModelGraph.for_programme("Insomnia")
+    graph.results()
+    graph.update({"cost_per_session": 200.0})
+    graph.results()
+    assert graph.recompute_counts["decay_integral"] == 1
+    assert graph.recompute_counts["total_cost"] == 2
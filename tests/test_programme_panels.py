@@ -0,0 +1,31 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from tests.test_scenario_library import APP_PATH
+
+
+@pytest.fixture(scope="module")
+def app():
+    return AppTest.from_file(APP_PATH, default_timeout=120).run()
+
+
+def test_break_even_only_runs_when_asked(app):
+    assert not [m for m in app.metric if m.label.startswith("Break-even")]
+    app.toggle(key="break_even_run_Insomnia").set_value(True).run()
+    assert not app.exception
+    answers = [m for m in app.metric if m.label.startswith("Break-even")] + [i for i in app.info if "reaches that target" in i.value]
+    assert len(answers) == 1
+
+
+def test_sensitivities_only_run_when_asked(app):
+    tables = len(app.dataframe)
+    app.toggle(key="sensitivity_run_Insomnia").set_value(True).run()
+    assert not app.exception
+    assert len(app.dataframe) == tables + 1
+
+
+def test_scale_costs_only_run_when_asked(app):
+    assert not [m for m in app.metric if m.label == "Marginal cost of one more participant"]
+    app.toggle(key="scale_run_Insomnia").set_value(True).run()
+    assert not app.exception
+    assert [m for m in app.metric if m.label == "Marginal cost of one more participant"]
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from streamlit.testing.v1 import AppTest
+
+import rendering
+from rendering import payload_summary, screen_points, start_payload_meter
+from tests.test_scenario_library import APP_PATH
+
+
+def test_meter_is_unavailable_without_a_running_app():
+    assert start_payload_meter() is None
+    assert "unavailable" in payload_summary(None)
+
+
+def test_meter_is_unavailable_when_the_queue_is_missing(monkeypatch):
+    monkeypatch.setattr(rendering, "get_script_run_ctx", lambda: SimpleNamespace())
+    assert start_payload_meter() is None
+
+
+def test_meter_reports_payload_in_the_app():
+    at = AppTest.from_file(APP_PATH, default_timeout=120).run()
+    assert not at.exception
+    assert any("This rerun sent" in caption.value for caption in at.caption)
+
+
+def test_thinning_keeps_the_ends_and_straight_lines_collapse():
+    assert list(screen_points(range(100), [2.0 * x for x in range(100)])) == [0, 99]
@@ -0,0 +1,66 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from config import offerings
+from model import default_scenario, evaluate_scenario_columns, scenario_columns
+from results_store import (
+    chunk_sizes,
+    count_results,
+    open_results,
+    result_filter,
+    summarise_results,
+    write_results,
+    write_uncertainty_samples,
+)
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_rewrite_replaces_previous_run(tmp_path, format):
+    path = str(tmp_path / "results")
+    write_uncertainty_samples(path, 3000, format=format, chunk_size=1024, seed=1)
+    assert count_results(open_results(path)) == 3000 * len(offerings)
+
+    with pytest.raises(ValueError):
+        write_uncertainty_samples(path, 100, format=format, chunk_size=1024, seed=2)
+    (tmp_path / "results" / "notes.txt").write_text("keep me")
+    write_uncertainty_samples(path, 100, format=format, chunk_size=1024, seed=2, overwrite=True)
+    assert count_results(open_results(path)) == 100 * len(offerings)
+    assert (tmp_path / "results" / "notes.txt").read_text() == "keep me"
+
+def test_chunk_sizes_are_powers_of_two():
+    sizes = chunk_sizes(200_000, 2 ** 16)
+    assert sum(sizes) == 200_000
+    assert all(size & (size - 1) == 0 for size in sizes)
+    with pytest.raises(ValueError):
+        chunk_sizes(1000, 1000)
+
+def test_sobol_run_has_no_balance_warning(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        write_uncertainty_samples(str(tmp_path / "results"), 1000, method="sobol", chunk_size=256, seed=0, programmes=["Insomnia"])
+
+def test_totals_read_back_exactly(tmp_path):
+    scenarios = [default_scenario("Insomnia", {"num_participants": n}) for n in range(10, 1000, 7)]
+    columns = scenario_columns(scenarios)
+    path = str(tmp_path / "results")
+    write_results(path, columns, chunk_size=32)
+    dataset = open_results(path)
+    expected = evaluate_scenario_columns(columns)["Total Cost (Money Spent)"]
+    table = dataset.to_table(columns=["num_participants", "Total Cost (Money Spent)"]).sort_by("num_participants")
+    assert np.array_equal(table.column("Total Cost (Money Spent)").to_numpy(), np.sort(expected))
+    summary = summarise_results(dataset, metrics=("Total Cost (Money Spent)",), filter=result_filter(["Insomnia"]))
+    assert summary.loc[("Insomnia", "Total Cost (Money Spent)"), "Draws"] == len(scenarios)
+
+def test_per_hour_costs_leave_out_draws_without_hours(tmp_path):
+    # Half the scenarios lose hours (post < pre), so their cost per hour is negative and isn't a cost
+    scenarios = [default_scenario("Insomnia", {"post_hours": post, "pre_hours": 30}) for post in range(20, 40)]
+    columns = scenario_columns(scenarios)
+    hours = evaluate_scenario_columns(columns)["Number of Productive Hours Bought"]
+    path = str(tmp_path / "results")
+    write_results(path, columns, chunk_size=32)
+    summary = summarise_results(open_results(path), metrics=("Cost per Productive Hour Bought",))
+    row = summary.loc[("Insomnia", "Cost per Productive Hour Bought")]
+    assert 0 < row["Draws"] == np.count_nonzero(hours > 0) < len(scenarios)
+    assert row["Min"] > 0
@@ -0,0 +1,46 @@
+import warnings
+
+import numpy as np
+
+from break_even import SOLVABLE_INPUTS
+from config import INPUT_BOUNDS
+from model import default_scenario
+from sampling import compare_methods, default_uncertainty, estimate_percentiles, unit_samples
+
+
+def test_default_uncertainty_stays_inside_widget_ranges():
+    scenario = default_scenario("Bespoke Offering", {"prop_time_work": 0.95, "retention_rate": 0.9})
+    for field, (_, low, mode, high) in default_uncertainty(scenario).items():
+        bound_low, bound_high = INPUT_BOUNDS[field]
+        assert bound_low <= low <= mode <= high
+        assert bound_high is None or high <= bound_high
+
+
+def test_break_even_searches_the_widget_ranges():
+    for field, (low, high) in SOLVABLE_INPUTS.items():
+        bound_low, bound_high = INPUT_BOUNDS[field]
+        assert low == bound_low
+        if bound_high is not None:
+            assert high == bound_high
+
+
+def test_cost_per_hour_percentiles_leave_out_draws_without_hours():
+    # A small gain, so a sizeable share of draws lose hours overall
+    scenario = default_scenario("Insomnia", {"pre_hours": 30, "post_hours": 33})
+    df = estimate_percentiles(scenario, n=512, seed=1)
+    assert 0 < df.attrs["non_positive_hours_share"] < 1
+    assert df.loc[("Number of Productive Hours Bought", 5), "Estimate"] < 0
+    assert df.loc[("Cost per Productive Hour Bought", 5), "Estimate"] > 0
+
+
+def test_sobol_converges_faster_than_random_draws():
+    errors = compare_methods(default_scenario("Insomnia"), n=1024, methods=("random", "sobol"), seed=1)
+    assert list(errors.columns) == ["random", "sobol", "sobol vs random"]
+    assert np.all(errors["sobol vs random"] > 1)
+
+def test_sobol_rounds_up_to_a_power_of_two():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error") # scipy warns when Sobol points are drawn in other counts
+        u = unit_samples("sobol", 1000, 4, seed=3)
+    assert u.shape == (1000, 4)
+    np.testing.assert_array_equal(u, unit_samples("sobol", 1024, 4, seed=3)[:1000])
@@ -0,0 +1,35 @@
+import numpy as np
+
+from config import DEFAULT_COACH_HIRING_AMORTISATION_YEARS, DEFAULT_COACH_HIRING_COST
+from model import default_scenario
+from scale_costs import scale_frontier
+
+PARTICIPANTS = np.arange(1000, 12001, 250)
+
+
+def test_dropouts_do_not_change_coach_costs():
+    # Booked sessions are paid for either way, so retention only moves the hours
+    low = scale_frontier([default_scenario("Insomnia", {"retention_rate": 0.3, "avg_sessions_dropouts": 0})], PARTICIPANTS)
+    high = scale_frontier([default_scenario("Insomnia", {"retention_rate": 0.95})], PARTICIPANTS)
+    for column in ("Direct Cost", "Idle Capacity Cost", "Hiring Cost", "Supervision Cost", "Total Cost"):
+        np.testing.assert_allclose(low[column], high[column])
+    assert np.all(low["Net Prod. Hours"] < high["Net Prod. Hours"])
+
+
+def test_booked_sessions_and_idle_slots_add_up_to_paid_capacity():
+    scenario = default_scenario("Bespoke Offering")
+    frontier = scale_frontier([scenario], PARTICIPANTS)
+    hired = frontier["Coaches Hired"] > 0
+    assert hired.any()
+    # Beyond the current team, every session a new coach could give is paid for exactly once
+    paid_sessions = (frontier["Direct Cost"] + frontier["Idle Capacity Cost"]) / scenario["cost_per_session"]
+    assert np.all(paid_sessions[hired] >= frontier["Sessions Booked"][hired] - 1e-9)
+    steps = np.diff(paid_sessions[hired].to_numpy())
+    assert np.all(steps >= -1e-6)
+
+
+def test_hiring_is_amortised():
+    frontier = scale_frontier([default_scenario("Insomnia")], PARTICIPANTS)
+    np.testing.assert_allclose(
+        frontier["Hiring Cost"], frontier["Coaches Hired"] * DEFAULT_COACH_HIRING_COST / DEFAULT_COACH_HIRING_AMORTISATION_YEARS
+    )
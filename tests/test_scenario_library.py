@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from config import offerings
+from model import default_scenario
+from scenario_library import (
+    MODEL_PARAMETER_WIDGETS,
+    PROGRAMME_WIDGETS,
+    decode_state,
+    encode_state,
+    load_library,
+    restore_app_state,
+    save_to_library,
+)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _default_state():
+    # What the widgets hold on first load, in widget units
+    state = {}
+    for tab in offerings:
+        scenario = default_scenario(tab)
+        for key, field, kind, divisor in PROGRAMME_WIDGETS:
+            value = scenario[field] if kind == "choice" else scenario[field] * divisor
+            state[key.format(tab=tab)] = int(value) if kind == "int" else value
+    scenario = default_scenario(next(iter(offerings)))
+    for key, field, kind, divisor in MODEL_PARAMETER_WIDGETS:
+        value = scenario[field] * divisor
+        state[key] = int(value) if kind == "int" else value
+    return state
+
+
+def test_round_trip():
+    state = _default_state()
+    assert decode_state(encode_state(state)) == state
+
+def test_round_trip_with_missing_keys():
+    state = _default_state()
+    del state["custom_3month_Insomnia"], state["months_to_zero_Procrastination"]
+    assert decode_state(encode_state(state)) == state
+
+@pytest.mark.parametrize("key, value", [
+    ("num_participants_Insomnia", 5000),
+    ("annual_decay_Bespoke Offering", 100.0),
+    ("retention_rate_Procrastination", -1.0),
+    ("working_weeks_global", 60),
+    ("session_duration_global", 0.0),
+    ("cost_per_session_global", float("nan")),
+])
+def test_out_of_range_codes_are_rejected(key, value):
+    state = _default_state()
+    state[key] = value
+    with pytest.raises(ValueError):
+        decode_state(encode_state(state))
+
+def test_restore_checks_values_and_drops_unknown_keys():
+    session_state = {}
+    restore_app_state(session_state, {"num_participants_Insomnia": 200, "not_a_widget": 1})
+    assert session_state == {"num_participants_Insomnia": 200}
+    with pytest.raises(ValueError):
+        restore_app_state(session_state, {"num_participants_Insomnia": 5000})
+    with pytest.raises(ValueError):
+        restore_app_state(session_state, {"decay_model_Insomnia": "Step Decay"})
+
+@pytest.mark.parametrize("code", ["", "not a code", encode_state({})[:-3] + "!!!"])
+def test_bad_codes_raise_value_error(code):
+    with pytest.raises(ValueError):
+        decode_state(code)
+
+def test_corrupt_library_raises_value_error_and_is_not_overwritten(tmp_path):
+    path = tmp_path / "library.json"
+    path.write_text('{"Saved": "abc"')
+    with pytest.raises(ValueError):
+        load_library(str(path))
+    with pytest.raises(ValueError):
+        save_to_library("New", encode_state(_default_state()), str(path))
+    assert path.read_text() == '{"Saved": "abc"'
+
+def test_library_round_trip(tmp_path):
+    path = str(tmp_path / "library.json")
+    code = encode_state(_default_state())
+    save_to_library("Defaults", code, path)
+    assert load_library(path) == {"Defaults": code}
+    with open(path) as f:
+        assert json.load(f) == {"Defaults": code}
+
+def test_out_of_range_link_shows_a_warning():
+    state = _default_state()
+    state["num_participants_Insomnia"] = 5000
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.query_params["scenario"] = encode_state(state)
+    at.run()
+    assert not at.exception
+    assert any("Couldn't load the scenario" in warning.value for warning in at.warning)
+
+def test_saved_scenario_named_like_the_live_settings_stays_separate():
+    at = AppTest.from_string(f"""
+import tabs.scenario_library_tab as tab
+tab.load_library = lambda: {{"Current settings": {encode_state(_default_state())!r}}}
+tab.display_scenario_library()
+""", default_timeout=120).run()
+    compared = at.multiselect(key="scenario_library_compared")
+    assert compared.value == [None]
+    compared.select("Current settings").run()
+    assert not at.exception
+    assert list(at.dataframe[0].value.columns[:2]) == ["Current settings", "Current settings (saved)"]
+
+    at.text_input(key="scenario_library_save_name").set_value("Current settings")
+    at.button(key="scenario_library_save").click().run()
+    assert any("reserved" in error.value for error in at.error)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from model import NUMERIC_FIELDS, default_scenario, evaluate_scenario_columns, scenario_columns
+from sensitivity import elasticities, gradients, sensitivity_table
+from tests.test_model import _random_scenarios
+
+METRICS = ("Number of Productive Hours Bought", "Cost per Productive Hour Bought")
+DIFFERENTIABLE_FIELDS = [field for field in NUMERIC_FIELDS if field != "working_weeks"]
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return scenario_columns(_random_scenarios(90, seed=7))
+
+
+@pytest.mark.parametrize("field", DIFFERENTIABLE_FIELDS)
+def test_gradients_match_central_differences(columns, field):
+    grads = gradients(columns)
+    step = 1e-5 * np.maximum(np.abs(columns[field]), 1.0)
+    shifted = {}
+    for direction in (1, -1):
+        trial = dict(columns)
+        trial[field] = columns[field] + direction * step
+        shifted[direction] = evaluate_scenario_columns(trial)
+    results = evaluate_scenario_columns(columns)
+    for metric in METRICS:
+        numeric = (shifted[1][metric] - shifted[-1][metric]) / (2 * step)
+        # Rounding in the differences is relative to the metric itself, so near-zero slopes get an absolute allowance
+        allowance = 1e-6 * np.abs(results[metric]) / np.maximum(np.abs(columns[field]), 1.0)
+        assert np.all(np.abs(grads[field][metric] - numeric) <= 1e-4 * np.abs(numeric) + allowance), metric
+
+
+def test_working_weeks_is_the_change_from_one_more_week(columns):
+    trial = dict(columns)
+    trial["working_weeks"] = columns["working_weeks"] + 1
+    expected = {metric: evaluate_scenario_columns(trial)[metric] - evaluate_scenario_columns(columns)[metric] for metric in METRICS}
+    grads = gradients(columns)
+    for metric in METRICS:
+        np.testing.assert_allclose(grads["working_weeks"][metric], expected[metric], rtol=1e-12)
+
+
+def test_elasticities_scale_gradients_by_input_over_output(columns):
+    grads = gradients(columns)
+    results = evaluate_scenario_columns(columns)
+    elastic = elasticities(columns)
+    for field in ("post_hours", "retention_rate", "cost_per_session"):
+        np.testing.assert_allclose(
+            elastic[field]["Cost per Productive Hour Bought"],
+            grads[field]["Cost per Productive Hour Bought"] * columns[field] / results["Cost per Productive Hour Bought"]
+        )
+
+
+def test_sensitivity_table_lists_inputs_in_slider_units():
+    table = sensitivity_table(default_scenario("Insomnia"))
+    assert "Post-intervention hours" in table.index
+    assert table.loc["Post-intervention hours", "Net Prod. Hours Bought"] > 0
+    assert table.loc["Cost per session ($)", "Cost / Prod. Hr"] > 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from streaming_stats import MetricSummaries, QuantileSketch, RunningMoments, StreamingSummary
+
+
+def test_moments_match_numpy_and_merge():
+    rng = np.random.default_rng(0)
+    draws = rng.lognormal(size=50_000)
+    left, right = RunningMoments(), RunningMoments()
+    for chunk in np.array_split(draws[:20_000], 7):
+        left.update(chunk)
+    right.update(draws[20_000:])
+    left.merge(right)
+    assert left.count == draws.size
+    assert left.mean == pytest.approx(draws.mean(), rel=1e-12)
+    assert left.std == pytest.approx(draws.std(ddof=1), rel=1e-9)
+    assert (left.min, left.max) == (draws.min(), draws.max())
+
+def test_sketch_percentiles_close_to_exact():
+    rng = np.random.default_rng(1)
+    draws = rng.lognormal(size=200_000)
+    shards = [QuantileSketch() for _ in range(4)]
+    for shard, chunk in zip(shards, np.array_split(draws, 4)):
+        for piece in np.array_split(chunk, 9):
+            shard.update(piece)
+    sketch = shards[0]
+    for shard in shards[1:]:
+        sketch.merge(shard)
+    percentiles = (1, 5, 25, 50, 75, 95, 99)
+    estimate = sketch.percentiles(percentiles)
+    # Compare by rank: each estimate should sit within half a percentile of the true one
+    ranks = np.searchsorted(np.sort(draws), estimate) / draws.size * 100
+    assert np.abs(ranks - np.array(percentiles)).max() < 0.5
+
+def test_spill_file_starts_empty(tmp_path):
+    first = MetricSummaries(spill_dir=str(tmp_path))
+    first.update("Insomnia", "Cost per Productive Hour Bought", np.arange(10.0))
+    second = MetricSummaries(spill_dir=str(tmp_path))
+    second.update("Insomnia", "Cost per Productive Hour Bought", np.arange(5.0))
+    spilled = second.summaries[("Insomnia", "Cost per Productive Hour Bought")].spilled_draws()
+    assert np.array_equal(spilled, np.arange(5.0, dtype=np.float32))
+
+def test_merge_appends_other_spill(tmp_path):
+    a = StreamingSummary(spill_path=str(tmp_path / "a.f32"))
+    b = StreamingSummary(spill_path=str(tmp_path / "b.f32"))
+    a.update([1.0, 2.0])
+    b.update([3.0])
+    a.merge(b)
+    assert a.spilled_draws().tolist() == [1.0, 2.0, 3.0]
+    assert a.moments.count == 3
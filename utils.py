@@ -2,20 +2,32 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import altair as alt
-from scipy.interpolate import PchipInterpolator
+# The calculation itself lives in the streamlit-free model core
+from model import (
+    custom_curve_interpolator,
+    exponential_decay_series,
+    linear_decay_series,
+)
+from decay_tables import DECAY_TABLE_PATH, load_or_build_decay_table
+from rendering import lean_rendering, thin_line_data
+
+@st.cache_resource(show_spinner="Precomputing decay tables...")
+def decay_lookup_table():
+    # Shared by every session; None when the lookup is turned off or its file can't be used
+    return load_or_build_decay_table(DECAY_TABLE_PATH)
 
 # --- Function to display Decay Visualisation --- (Phase 2)
-def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_zero_input, month_3_slider, month_6_slider, month_9_slider, month_12_slider, timeframe_of_interest_weeks_calc):
-    # Generate data for visualization
-    months = np.arange(0, 13, 1)  # 0 to 12 months
-    custom_curve_weekly_points = None
+def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_zero_input, month_3_slider, month_6_slider, month_9_slider, month_12_slider, decay_table=None):
+    # Generate data for visualization (looked up from the precomputed decay table when one is given)
+    # Low-bandwidth mode keeps each chart's spec fixed (the slider shows the value) so only its data changes
+    lean = lean_rendering()
 
     if decay_model == "Exponential Decay":
         if annual_decay_rate_input is None: # Handle case where it might be None if not selected
             st.warning("Annual decay rate not set for Exponential Decay. Visualization may be incorrect.")
-            return None # Or display a placeholder chart
-        monthly_decay_rate = 1 - (1 - annual_decay_rate_input)**(1/12)
-        decay_values = [1 * (1 - monthly_decay_rate)**month for month in months]
+            return # Or display a placeholder chart
+        series = decay_table.exponential_series(annual_decay_rate_input) if decay_table is not None else None
+        months, decay_values = series if series is not None else exponential_decay_series(annual_decay_rate_input)
         
         decay_df = pd.DataFrame({
             'Month': months,
@@ -27,7 +39,7 @@ def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_
             y=alt.Y('Relative Benefit:Q', title='Relative Benefit', scale=alt.Scale(domain=[0, 1])),
             tooltip=['Month', 'Relative Benefit']
         ).properties(
-            title=f"Exponential Decay with {annual_decay_rate_input*100:.1f}% Annual Decay Rate",
+            title="Exponential Decay" if lean else f"Exponential Decay with {annual_decay_rate_input*100:.1f}% Annual Decay Rate",
             width=600,
             height=300
         )
@@ -37,9 +49,9 @@ def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_
     elif decay_model == "Linear Decay":
         if months_to_zero_input is None:
             st.warning("Months to zero not set for Linear Decay. Visualization may be incorrect.")
-            return None
-        months_to_plot = np.arange(0, max(13, months_to_zero_input + 1), 1)
-        decay_values = [max(0, 1 - month/months_to_zero_input) for month in months_to_plot]
+            return
+        series = decay_table.linear_series(months_to_zero_input) if decay_table is not None else None
+        months_to_plot, decay_values = series if series is not None else linear_decay_series(months_to_zero_input)
         
         decay_df = pd.DataFrame({
             'Month': months_to_plot,
@@ -51,7 +63,7 @@ def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_
             y=alt.Y('Relative Benefit:Q', title='Relative Benefit', scale=alt.Scale(domain=[0, 1])),
             tooltip=['Month', 'Relative Benefit']
         ).properties(
-            title=f"Linear Decay to Zero After {months_to_zero_input} Months",
+            title="Linear Decay to Zero" if lean else f"Linear Decay to Zero After {months_to_zero_input} Months",
             width=600,
             height=300
         )
@@ -62,27 +74,19 @@ def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_
         # Ensure slider values are not None before using them
         if not all([month_3_slider is not None, month_6_slider is not None, month_9_slider is not None, month_12_slider is not None]):
             st.warning("Custom curve control points not fully defined. Visualization may be incorrect.")
-            return None
+            return
             
-        control_points_custom = {
-            0: 1.0, 3: month_3_slider, 6: month_6_slider,
-            9: month_9_slider, 12: month_12_slider
-        }
-        x_points = np.array(list(control_points_custom.keys()))
-        y_points = np.array(list(control_points_custom.values()))
-        
-        interp_func = PchipInterpolator(x_points, y_points)
+        x_points = np.array([0, 3, 6, 9, 12])
+        y_points = np.array([1.0, month_3_slider, month_6_slider, month_9_slider, month_12_slider])
+
+        interp_func = custom_curve_interpolator(month_3_slider, month_6_slider, month_9_slider, month_12_slider)
         months_fine = np.linspace(0, 12, 100)
         decay_values_fine = np.clip(interp_func(months_fine), 0, 1)
-        
-        custom_curve_weekly_points = []
-        weeks_in_period_calc = int(timeframe_of_interest_weeks_calc)
-        for w in range(weeks_in_period_calc):
-            month_equiv = (w / weeks_in_period_calc) * 12
-            benefit_at_week = float(interp_func(month_equiv))
-            custom_curve_weekly_points.append(max(0, min(1, benefit_at_week)))
 
         custom_decay_df = pd.DataFrame({'Month': months_fine, 'Relative Benefit': decay_values_fine})
+        if lean:
+            # Only the points needed to draw the curve to within half a pixel
+            custom_decay_df = thin_line_data(custom_decay_df, 'Month', 'Relative Benefit', y_domain=(0, 1))
         control_df = pd.DataFrame({'Month': x_points, 'Relative Benefit': y_points})
         
         line_chart = alt.Chart(custom_decay_df).mark_line().encode(
@@ -97,57 +101,3 @@ def display_decay_visualisation(decay_model, annual_decay_rate_input, months_to_
         )
         st.altair_chart(combined_chart, use_container_width=True)
         st.caption("This graph shows your custom decay curve. Adjust sliders to reshape.")
-
-    return custom_curve_weekly_points
-
-# --- Function to calculate total gain per EA --- 
-def calculate_total_gain_per_ea(
-    initial_weekly_gain_per_ea_abs,
-    decay_model,
-    timeframe_of_interest_weeks, 
-    working_weeks_per_year, 
-    annual_decay_rate=None, 
-    months_to_zero=None,
-    custom_weekly_points=None
-):
-    total_gain = 0.0
-
-    if decay_model == "Exponential Decay":
-        if annual_decay_rate is None:
-            raise ValueError("Annual decay rate must be provided for Exponential Decay model.")
-
-        if annual_decay_rate == 0.0 or annual_decay_rate == 1.0:
-            raise ValueError("Annual decay rate cannot be 0% (0.0) or 100% (1.0) for Exponential Decay. Please choose a value strictly between 0 and 1.")
-
-        if working_weeks_per_year > 0 and 0 < annual_decay_rate < 1:
-            weekly_decay_factor = (1.0 - annual_decay_rate)**(1.0 / working_weeks_per_year)
-            if abs(1.0 - weekly_decay_factor) < 1e-9: 
-                 total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks
-            else:
-                total_gain = initial_weekly_gain_per_ea_abs * \
-                                            (1.0 - weekly_decay_factor**timeframe_of_interest_weeks) / \
-                                            (1.0 - weekly_decay_factor)
-        elif working_weeks_per_year <= 0:
-            total_gain = 0.0
-        else:
-            total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks
-
-    elif decay_model == "Linear Decay":
-        if months_to_zero is not None and working_weeks_per_year > 0 and months_to_zero > 0:
-            weeks_to_zero_calc = (months_to_zero / 12) * working_weeks_per_year
-            if weeks_to_zero_calc > 0: # Redundant check but safe
-                effective_weeks = min(timeframe_of_interest_weeks, weeks_to_zero_calc)
-                for w_idx in range(int(effective_weeks)):
-                    weekly_benefit = initial_weekly_gain_per_ea_abs * max(0, (1 - w_idx / weeks_to_zero_calc))
-                    total_gain += weekly_benefit
-        else: 
-             total_gain = 0 
-
-    elif decay_model == "Custom Curve":
-        if custom_weekly_points:
-            for week_benefit_factor in custom_weekly_points:
-                total_gain += initial_weekly_gain_per_ea_abs * week_benefit_factor
-        else:
-            total_gain = initial_weekly_gain_per_ea_abs * timeframe_of_interest_weeks * 0.5
-    
-    return total_gain 
\ No newline at end of file